@@ -0,0 +1,378 @@
+"""
+Response caching helpers for provider modules.
+
+Upstream responses are cached under a key built from the endpoint and the
+canonicalized query parameters of the tool call, so identical calls made by an
+LLM agent are answered locally until their time-to-live expires.
+
+An optional SQLite backed `DiskCache` can sit behind the in-memory cache so that
+short-lived server processes (one per client session) share their responses, and
+concurrent misses for the same key are coalesced into a single upstream request
+by `SingleFlight`.
+
+For slowly changing data, `TTLCache.get_or_revalidate` serves expired entries
+immediately (stale-while-revalidate) while refreshing them in the background.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, TypeVar
+
+import anyio
+from anyio.abc import TaskGroup
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+
+def make_cache_key(endpoint: str, params: dict[str, Any] | None = None) -> str:
+    """
+    Build a canonical cache key for a request.
+
+    Args:
+        endpoint: The requested URL.
+        params: The query parameters, typically `params.model_dump(exclude_none=True)`.
+
+    Returns:
+        A key that is identical for identical requests regardless of parameter order.
+    """
+    query = json.dumps(params or {}, sort_keys=True, separators=(",", ":"), default=str)
+    return f"{endpoint}?{query}"
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls sharing a key into a single execution.
+
+    The first caller for a key runs the fetch, callers arriving while it is in
+    flight wait for it and receive the same result or exception. If the running
+    call is cancelled, one of the waiting callers takes over.
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = anyio.Event()
+            self.value: Any = None
+            self.error: Exception | None = None
+            self.cancelled = False
+
+    def __init__(self):
+        self._calls: dict[str, SingleFlight._Call] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._calls
+
+    async def do(self, key: str, fetch: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `fetch`, or wait for the call already in flight for `key`.
+
+        Args:
+            key: The key identifying identical calls, see `make_cache_key`.
+            fetch: Coroutine function producing the value.
+
+        Returns:
+            The value produced by the call in flight.
+        """
+        while (call := self._calls.get(key)) is not None:
+            await call.done.wait()
+            if call.error is not None:
+                raise call.error
+            if not call.cancelled:
+                return call.value
+
+        call = self._calls[key] = self._Call()
+        try:
+            call.value = await fetch()
+            return call.value
+        except Exception as e:
+            call.error = e
+            raise
+        except BaseException:
+            call.cancelled = True
+            raise
+        finally:
+            del self._calls[key]
+            call.done.set()
+
+
+class DiskCache:
+    """
+    Persistent key/value cache stored in a SQLite database.
+
+    The database runs in WAL mode so several server processes can read and write
+    the same file concurrently. Values must be JSON serializable. Entries expire
+    after their time-to-live, and the least recently used entries are evicted
+    once the stored values exceed `max_bytes`.
+
+    Args:
+        path: The SQLite database file, created if missing.
+        max_bytes: Maximum total size of the stored values.
+    """
+
+    def __init__(self, path: str | Path, max_bytes: int = 64 * 1024 * 1024):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, timeout=5.0, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+
+    @classmethod
+    def from_env(cls, name: str) -> "DiskCache | None":
+        """
+        Open the disk cache `name` under `ODMCP_CACHE_DIR`, if that variable is set.
+
+        Args:
+            name: The cache name, typically the provider name.
+
+        Returns:
+            The disk cache, or None when disk caching is not enabled.
+        """
+        cache_dir = os.getenv("ODMCP_CACHE_DIR")
+        if not cache_dir:
+            return None
+
+        max_bytes = os.getenv("ODMCP_CACHE_MAX_BYTES")
+        try:
+            if max_bytes:
+                return cls(Path(cache_dir) / f"{name}.sqlite3", int(max_bytes))
+            return cls(Path(cache_dir) / f"{name}.sqlite3")
+        except (OSError, sqlite3.Error) as e:
+            log.error(f"Error opening disk cache in {cache_dir}: {e}")
+            return None
+
+    def get(self, key: str) -> tuple[float, Any] | None:
+        """Return `(expires_at, value)` for `key`, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries "
+                "WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        return row[1], json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store `value` under `key` for `ttl` seconds and evict if over budget."""
+        now = time.time()
+        data = json.dumps(value, separators=(",", ":"), default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now + ttl, now),
+            )
+            self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                "SELECT key FROM (SELECT key, SUM(size) OVER "
+                "(ORDER BY accessed_at DESC, key) AS total FROM entries) "
+                "WHERE total > ?)",
+                (self.max_bytes,),
+            )
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class TTLCache:
+    """
+    In-memory cache with per-entry time-to-live and LRU eviction.
+
+    Args:
+        maxsize: Maximum number of entries kept, the least recently used entry is
+            evicted first. A size of 0 disables the in-memory tier.
+        ttl: Default time-to-live of entries in seconds.
+        clock: Monotonic clock used to expire entries.
+        disk: Optional persistent tier consulted by `get_or_fetch` on memory misses
+            and written to on every fetch.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        ttl: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+        disk: DiskCache | None = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.disk = disk
+        self.flights = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value for `key`, or `default` if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        """Store `value` under `key` for `ttl` seconds (the cache default if None)."""
+        if self.maxsize <= 0:
+            return
+
+        expires_at = self.clock() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return the hit/miss counters (stale hits included) and the current size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "size": len(self._entries),
+        }
+
+    async def get_or_fetch(
+        self, key: str, fetch: Callable[[], Awaitable[T]], ttl: float | None = None
+    ) -> T:
+        """
+        Return the cached value for `key`, fetching and storing it on a miss.
+
+        Concurrent misses for the same key share a single `fetch` call.
+
+        Args:
+            key: The cache key, see `make_cache_key`.
+            fetch: Coroutine function producing the value on a miss.
+            ttl: Time-to-live of a fetched value (the cache default if None).
+
+        Returns:
+            The cached or freshly fetched value.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        ttl = self.ttl if ttl is None else ttl
+        return await self.flights.do(key, lambda: self._load(key, fetch, ttl))
+
+    async def get_or_revalidate(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[T]],
+        ttl: float | None = None,
+        max_stale: float = 0.0,
+        task_group: TaskGroup | None = None,
+    ) -> tuple[T, bool]:
+        """
+        Like `get_or_fetch`, but serve expired entries while they are refreshed.
+
+        An entry expired for less than `max_stale` seconds is returned at once, and
+        a single refresh is started in `task_group`. Older entries, and every entry
+        when no task group is given, are fetched as in `get_or_fetch`. Only the
+        in-memory tier serves stale entries.
+
+        Args:
+            key: The cache key, see `make_cache_key`.
+            fetch: Coroutine function producing the value.
+            ttl: Time-to-live of a fetched value (the cache default if None).
+            max_stale: How long after its expiry an entry may still be served.
+            task_group: The task group running the background refreshes.
+
+        Returns:
+            The value, and whether it is stale.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and task_group is not None:
+            expires_at, value = entry
+            now = self.clock()
+            if expires_at <= now < expires_at + max_stale:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.stale_hits += 1
+                if key not in self.flights:
+                    task_group.start_soon(self._revalidate, key, fetch, ttl)
+                return value, True
+
+        return await self.get_or_fetch(key, fetch, ttl), False
+
+    async def _revalidate(
+        self, key: str, fetch: Callable[[], Awaitable[Any]], ttl: float | None
+    ) -> None:
+        """Refresh a stale entry, keeping it if the refresh fails."""
+        ttl = self.ttl if ttl is None else ttl
+        try:
+            await self.flights.do(key, lambda: self._load(key, fetch, ttl))
+        except Exception as e:
+            log.warning(f"Error refreshing stale cache entry {key}: {e}")
+
+    async def _load(self, key: str, fetch: Callable[[], Awaitable[T]], ttl: float) -> T:
+        """Load a missing value from the disk tier or `fetch`, and store it."""
+        if self.disk is not None:
+            try:
+                entry = await anyio.to_thread.run_sync(self.disk.get, key)
+            except sqlite3.Error as e:
+                log.error(f"Error reading disk cache: {e}")
+                entry = None
+            if entry is not None:
+                expires_at, value = entry
+                self.set(key, value, min(ttl, expires_at - time.time()))
+                return value
+
+        value = await fetch()
+        self.set(key, value, ttl)
+        if self.disk is not None:
+            try:
+                await anyio.to_thread.run_sync(self.disk.set, key, value, ttl)
+            except sqlite3.Error as e:
+                log.error(f"Error writing disk cache: {e}")
+        return value
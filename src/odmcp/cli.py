@@ -5,9 +5,10 @@ import platform
 import sys
 from pathlib import Path
 
-import anyio
 import click
 
+from odmcp.registry import get_provider_info, list_providers, provider_module
+
 
 @click.group()
 def cli():
@@ -15,42 +16,121 @@ def cli():
     pass
 
 
+def transport_options(command):
+    """Add the transport options shared by the server commands."""
+    options = [
+        click.option(
+            "--transport",
+            type=click.Choice(["stdio", "sse"]),
+            default="stdio",
+            show_default=True,
+            help="'stdio' for a single local client, 'sse' to serve many clients over HTTP.",
+        ),
+        click.option(
+            "--host", default="127.0.0.1", show_default=True, help="SSE bind address."
+        ),
+        click.option("--port", default=8000, show_default=True, help="SSE port."),
+        click.option(
+            "--session-concurrency",
+            type=click.IntRange(min=1),
+            default=4,
+            show_default=True,
+            help="Maximum concurrent tool calls per client session.",
+        ),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+
 @cli.command()
 @click.argument("provider")
-def run(provider: str):
+@transport_options
+def run(provider: str, transport: str, host: str, port: int, session_concurrency: int):
     """Run a specific provider MCP server."""
+    # heavy imports are deferred to the commands that need them
+    import anyio
+
+    from odmcp.utils import serve_providers
+
     try:
-        module = importlib.import_module(f"odmcp.providers.{provider}")
-        anyio.run(module.main)
+        module = importlib.import_module(provider_module(provider))
     except ImportError:
         click.echo(f"Provider '{provider}' not found.")
         sys.exit(1)
+
+    try:
+        # a single provider keeps its own tool names
+        anyio.run(
+            lambda: serve_providers(
+                [module],
+                transport=transport,
+                host=host,
+                port=port,
+                session_concurrency=session_concurrency,
+                prefix_tools=False,
+            )
+        )
     except Exception as e:
         click.echo(f"Error running provider: {e}")
         sys.exit(1)
 
 
 @cli.command()
-def list():
-    """List all available providers"""
+@click.option(
+    "--providers",
+    "-p",
+    required=True,
+    help="Comma separated list of providers to serve, e.g. 'ch_sbb,other'.",
+)
+@transport_options
+def serve(
+    providers: str, transport: str, host: str, port: int, session_concurrency: int
+):
+    """Run several providers in a single MCP server."""
+    import anyio
+
+    from odmcp.utils import serve_providers
+
+    modules = []
+    for provider in filter(None, (name.strip() for name in providers.split(","))):
+        try:
+            modules.append(importlib.import_module(provider_module(provider)))
+        except ImportError:
+            click.echo(f"Provider '{provider}' not found.")
+            sys.exit(1)
+
+    if not modules:
+        click.echo("No providers given.")
+        sys.exit(1)
+
     try:
-        import pkgutil
+        anyio.run(
+            lambda: serve_providers(
+                modules,
+                transport=transport,
+                host=host,
+                port=port,
+                session_concurrency=session_concurrency,
+            )
+        )
+    except Exception as e:
+        click.echo(f"Error running providers: {e}")
+        sys.exit(1)
 
-        import odmcp.providers as providers_pkg
 
-        # Get all modules in the providers package
-        providers = [
-            name
-            for finder, name, ispkg in pkgutil.iter_modules(providers_pkg.__path__)
-            if name not in ("__template__", "__init__", "utils")
-        ]
+@cli.command()
+def list():
+    """List all available providers"""
+    try:
+        providers = list_providers()
 
         if not providers:
             click.echo("No providers available")
             return
 
         click.echo("Available providers:")
-        for provider in sorted(providers):
+        for provider in providers:
             click.echo(f"  - {provider}")
     except Exception as e:
         click.echo(f"Error listing providers: {e}")
@@ -62,17 +142,19 @@ def list():
 def info(provider: str):
     """Show detailed information about a provider"""
     try:
-        module = importlib.import_module(f"odmcp.providers.{provider}")
+        provider_info = get_provider_info(provider)
+        if provider_info is None:
+            click.echo(
+                f"Provider '{provider}' not found. Make sure it's installed with:"
+            )
+            click.echo(f"uv pip install 'odmcp[{provider}]'")
+            sys.exit(1)
 
         click.echo(f"Provider: {provider}")
-        if hasattr(module, "__doc__") and module.__doc__:
-            click.echo(f"Description: {module.__doc__.strip()}")
-        if hasattr(module, "SUPPORTED_TYPES"):
-            click.echo(f"Supported types: {', '.join(module.SUPPORTED_TYPES)}")
-    except ImportError:
-        click.echo(f"Provider '{provider}' not found. Make sure it's installed with:")
-        click.echo(f"uv pip install 'odmcp[{provider}]'")
-        sys.exit(1)
+        if provider_info.description:
+            click.echo(f"Description: {provider_info.description}")
+        if provider_info.supported_types:
+            click.echo(f"Supported types: {', '.join(provider_info.supported_types)}")
     except Exception as e:
         click.echo(f"Error getting provider info: {e}")
         sys.exit(1)
@@ -0,0 +1,63 @@
+"""
+Settings models read from `ODMCP_*` environment variables.
+
+A settings model derives from `EnvConfig` and names its variables prefix, e.g.
+`ODMCP_RETRY_`: each field is then read from the variable named after it, e.g.
+`ODMCP_RETRY_MAX_ATTEMPTS` for `max_attempts`, and validated by the model.
+"""
+
+import os
+import typing
+from typing import Any, ClassVar, TypeVar
+
+from pydantic import BaseModel
+
+C = TypeVar("C", bound="EnvConfig")
+
+_COLLECTIONS = (list, set, frozenset, tuple)
+
+
+def env_value(annotation: Any, value: str) -> Any:
+    """
+    Coerce an environment variable to the input of a field.
+
+    Args:
+        annotation: The annotation of the field, e.g. `int | None`.
+        value: The value of the variable.
+
+    Returns:
+        None for an empty or 'none' value of an optional field, the items of a
+        comma separated value for a collection field, else the value itself, left
+        for the model to validate.
+    """
+    args = typing.get_args(annotation)
+    if type(None) in args and value.strip().lower() in ("", "none"):
+        return None
+    if any(typing.get_origin(t) in _COLLECTIONS for t in (annotation, *args)):
+        return [item.strip() for item in value.split(",") if item.strip()]
+    return value
+
+
+class EnvConfig(BaseModel):
+    """Base of the settings models read from the environment."""
+
+    env_prefix: ClassVar[str] = "ODMCP_"
+
+    @classmethod
+    def from_env(cls: type[C], **overrides: Any) -> C:
+        """
+        Build the settings from the `{env_prefix}{FIELD}` environment variables.
+
+        Args:
+            overrides: Values taking precedence over the environment.
+
+        Returns:
+            The resulting settings.
+        """
+        values: dict[str, Any] = {}
+        for name, field in cls.model_fields.items():
+            value = os.getenv(f"{cls.env_prefix}{name.upper()}")
+            if value is not None:
+                values[name] = env_value(field.annotation, value)
+        values.update(overrides)
+        return cls(**values)
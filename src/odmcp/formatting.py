@@ -0,0 +1,93 @@
+"""
+Tool output serialization helpers for provider modules.
+
+Handlers should render their responses with `format_response` rather than `str()`,
+which produces the verbose Python repr of nested Pydantic models. Compact JSON or a
+flat table is faster to build, smaller on the wire and cheaper in LLM context.
+"""
+
+import csv
+import io
+import json
+from typing import Any, Literal
+
+from pydantic import BaseModel
+
+OutputFormat = Literal["json", "csv", "tsv"]
+
+
+def select_fields(select: str | None) -> list[str] | None:
+    """
+    Extract the field names of a simple ODSQL `select` clause.
+
+    Args:
+        select: The select clause, e.g. 'title,description'.
+
+    Returns:
+        The selected field names, or None if the clause is empty or uses
+        expressions, aliases or wildcards that cannot be projected locally.
+    """
+    if not select:
+        return None
+
+    fields = [field.strip() for field in select.split(",")]
+    if not all(field.isidentifier() for field in fields):
+        return None
+    return fields
+
+
+def _project(item: Any, fields: list[str]) -> Any:
+    if not isinstance(item, dict):
+        return item
+    return {field: item[field] for field in fields if field in item}
+
+
+def _table(rows: list[Any], delimiter: str) -> str:
+    columns: dict[str, None] = {}
+    for row in rows:
+        columns.update(dict.fromkeys(row))
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter, lineterminator="\n")
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(
+            [
+                json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+                if isinstance(value, (dict, list))
+                else value
+                for value in (row.get(column) for column in columns)
+            ]
+        )
+    return buffer.getvalue()
+
+
+def format_response(
+    response: BaseModel,
+    format: OutputFormat = "json",
+    fields: list[str] | None = None,
+) -> str:
+    """
+    Serialize a tool response into compact text.
+
+    Args:
+        response: The response model, typically with a `results` list.
+        format: 'json' for compact JSON, 'csv' or 'tsv' to render `results` as a
+            table preceded by '# key: value' lines for the other top level fields.
+        fields: Optional field names to keep in each result, see `select_fields`.
+
+    Returns:
+        The serialized response.
+    """
+    data = response.model_dump(mode="json", exclude_none=True)
+    results = data.get("results")
+    if fields and isinstance(results, list):
+        data["results"] = results = [_project(item, fields) for item in results]
+
+    if format == "json" or not isinstance(results, list):
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+    header = "".join(
+        f"# {key}: {value}\n" for key, value in data.items() if key != "results"
+    )
+    return header + _table(results, "\t" if format == "tsv" else ",")
@@ -0,0 +1,360 @@
+"""
+Geometry helpers for provider modules.
+
+Line geometries returned by open data APIs can hold thousands of `[lon, lat]` pairs
+per feature. These helpers shrink them before they are validated and sent to the
+client: Douglas-Peucker simplification, coordinate quantization and encoding as a
+Google encoded polyline string.
+
+`SpatialIndex` answers nearest and bounding box queries over points and lines
+locally, without a round-trip to the upstream API.
+"""
+
+import math
+from typing import Hashable, Iterator
+
+Coordinates = list[list[float]]
+
+KM_PER_DEGREE = 111.32  # length of a degree of latitude
+
+
+def _segment_distance(
+    point: list[float], start: list[float], end: list[float]
+) -> float:
+    """Distance from `point` to the segment `start`-`end`, in coordinate units."""
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    if dx == 0 and dy == 0:
+        return math.hypot(point[0] - start[0], point[1] - start[1])
+
+    t = ((point[0] - start[0]) * dx + (point[1] - start[1]) * dy) / (dx * dx + dy * dy)
+    t = max(0.0, min(1.0, t))
+    return math.hypot(point[0] - start[0] - t * dx, point[1] - start[1] - t * dy)
+
+
+def simplify_line(coordinates: Coordinates, tolerance: float) -> Coordinates:
+    """
+    Simplify a line with the Douglas-Peucker algorithm.
+
+    Args:
+        coordinates: The line vertices as `[x, y]` pairs.
+        tolerance: Maximum distance between the simplified and the original line,
+            in coordinate units (degrees for lon/lat, 0.0001 is about 10 m).
+
+    Returns:
+        The retained vertices, always including both end points.
+    """
+    if len(coordinates) < 3 or tolerance <= 0:
+        return list(coordinates)
+
+    keep = [False] * len(coordinates)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(coordinates) - 1)]
+    while stack:
+        first, last = stack.pop()
+        max_distance, index = 0.0, first
+        for i in range(first + 1, last):
+            distance = _segment_distance(
+                coordinates[i], coordinates[first], coordinates[last]
+            )
+            if distance > max_distance:
+                max_distance, index = distance, i
+
+        if max_distance > tolerance:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+
+    return [point for point, kept in zip(coordinates, keep) if kept]
+
+
+def quantize(coordinates: Coordinates, precision: int) -> Coordinates:
+    """
+    Round coordinates and drop consecutive duplicates created by the rounding.
+
+    Args:
+        coordinates: The line vertices as `[x, y]` pairs.
+        precision: Number of decimals kept (5 is about 1 m for lon/lat).
+
+    Returns:
+        The quantized vertices.
+    """
+    quantized: Coordinates = []
+    for x, y, *_ in coordinates:
+        point = [round(x, precision), round(y, precision)]
+        if not quantized or quantized[-1] != point:
+            quantized.append(point)
+    return quantized
+
+
+def _encode_value(value: int) -> str:
+    value = ~(value << 1) if value < 0 else value << 1
+    chunks = []
+    while value >= 0x20:
+        chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+        value >>= 5
+    chunks.append(chr(value + 63))
+    return "".join(chunks)
+
+
+def encode_polyline(coordinates: Coordinates, precision: int = 5) -> str:
+    """
+    Encode `[lon, lat]` pairs with the Google encoded polyline algorithm.
+
+    Args:
+        coordinates: The line vertices as `[lon, lat]` pairs.
+        precision: Number of decimals kept (5 is the usual polyline precision).
+
+    Returns:
+        The encoded polyline, which stores `lat, lon` pairs as the format requires.
+    """
+    factor = 10**precision
+    encoded = []
+    previous_lat = previous_lon = 0
+    for lon, lat, *_ in coordinates:
+        lat_value, lon_value = round(lat * factor), round(lon * factor)
+        encoded.append(_encode_value(lat_value - previous_lat))
+        encoded.append(_encode_value(lon_value - previous_lon))
+        previous_lat, previous_lon = lat_value, lon_value
+    return "".join(encoded)
+
+
+def decode_polyline(polyline: str, precision: int = 5) -> Coordinates:
+    """
+    Decode a Google encoded polyline into `[lon, lat]` pairs.
+
+    Args:
+        polyline: The encoded polyline.
+        precision: Number of decimals used when encoding.
+
+    Returns:
+        The decoded vertices.
+    """
+    factor = 10**precision
+    values = []
+    value = shift = 0
+    for char in polyline:
+        byte = ord(char) - 63
+        value |= (byte & 0x1F) << shift
+        shift += 5
+        if byte < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value = shift = 0
+
+    coordinates: Coordinates = []
+    lat = lon = 0
+    for lat_delta, lon_delta in zip(values[::2], values[1::2]):
+        lat += lat_delta
+        lon += lon_delta
+        coordinates.append([lon / factor, lat / factor])
+    return coordinates
+
+
+def _segment_intersects_rect(
+    start: list[float], end: list[float], rect: tuple[float, float, float, float]
+) -> bool:
+    """Whether the segment `start`-`end` intersects `(min_x, min_y, max_x, max_y)`."""
+    # Liang-Barsky clipping of the segment against the rectangle
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    t0, t1 = 0.0, 1.0
+    for p, q in (
+        (-dx, start[0] - rect[0]),
+        (dx, rect[2] - start[0]),
+        (-dy, start[1] - rect[1]),
+        (dy, rect[3] - start[1]),
+    ):
+        if p == 0:
+            if q < 0:
+                return False
+        elif p < 0:
+            t0 = max(t0, q / p)
+        else:
+            t1 = min(t1, q / p)
+        if t0 > t1:
+            return False
+    return True
+
+
+class SpatialIndex:
+    """
+    Uniform grid index over points and lines given in `[lon, lat]`.
+
+    Geometries are projected with an equirectangular projection around `ref_lat`,
+    which is accurate enough for nearest searches at the scale of a country. A
+    key can be inserted several times, e.g. once per part of a multi-line.
+
+    Args:
+        cell_size_km: Side of a grid cell in kilometers.
+        ref_lat: Reference latitude of the projection, the center of the data.
+    """
+
+    def __init__(self, cell_size_km: float = 5.0, ref_lat: float = 0.0):
+        self.cell_size = cell_size_km
+        self._x_scale = KM_PER_DEGREE * math.cos(math.radians(ref_lat))
+        self._cells: dict[tuple[int, int], set[Hashable]] = {}
+        self._parts: dict[Hashable, list[Coordinates]] = {}
+        self._order: dict[Hashable, int] = {}  # insertion rank, to sort results
+        self._bounds: tuple[int, int, int, int] | None = None
+
+    def __len__(self) -> int:
+        return len(self._parts)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._parts
+
+    def _project(self, lon: float, lat: float) -> list[float]:
+        return [lon * self._x_scale, lat * KM_PER_DEGREE]
+
+    def _cell(self, point: list[float]) -> tuple[int, int]:
+        return math.floor(point[0] / self.cell_size), math.floor(
+            point[1] / self.cell_size
+        )
+
+    def _segments(self, key: Hashable) -> Iterator[tuple[list[float], list[float]]]:
+        for part in self._parts[key]:
+            if len(part) == 1:
+                yield part[0], part[0]
+            yield from zip(part, part[1:])
+
+    def insert(self, key: Hashable, coordinates: Coordinates) -> None:
+        """
+        Add a point or line geometry under `key`.
+
+        Args:
+            key: The identifier returned by queries.
+            coordinates: One or more `[lon, lat]` vertices.
+        """
+        if not coordinates:
+            return
+
+        part = [self._project(lon, lat) for lon, lat, *_ in coordinates]
+        self._order.setdefault(key, len(self._order))
+        self._parts.setdefault(key, []).append(part)
+
+        for start, end in zip(part, part[1:] or part):
+            (x0, y0), (x1, y1) = self._cell(start), self._cell(end)
+            for cx in range(min(x0, x1), max(x0, x1) + 1):
+                for cy in range(min(y0, y1), max(y0, y1) + 1):
+                    self._cells.setdefault((cx, cy), set()).add(key)
+            if self._bounds is None:
+                self._bounds = (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+            else:
+                bx0, by0, bx1, by1 = self._bounds
+                self._bounds = (
+                    min(bx0, x0, x1),
+                    min(by0, y0, y1),
+                    max(bx1, x0, x1),
+                    max(by1, y0, y1),
+                )
+
+    def distance_km(self, key: Hashable, lon: float, lat: float) -> float:
+        """Return the distance in kilometers from `[lon, lat]` to the geometry `key`."""
+        point = self._project(lon, lat)
+        return min(
+            _segment_distance(point, start, end) for start, end in self._segments(key)
+        )
+
+    def _ring_cells(self, cx: int, cy: int, ring: int) -> Iterator[tuple[int, int]]:
+        """Yield the cells of the ring around `(cx, cy)` within the data bounds."""
+        bx0, by0, bx1, by1 = self._bounds
+        xs = range(max(cx - ring, bx0), min(cx + ring, bx1) + 1)
+        for y in {cy - ring, cy + ring}:
+            if by0 <= y <= by1:
+                yield from ((x, y) for x in xs)
+        ys = range(max(cy - ring + 1, by0), min(cy + ring - 1, by1) + 1)
+        for x in {cx - ring, cx + ring}:
+            if bx0 <= x <= bx1:
+                yield from ((x, y) for y in ys)
+
+    def nearest(
+        self,
+        lon: float,
+        lat: float,
+        k: int = 1,
+        max_distance_km: float | None = None,
+    ) -> list[tuple[float, Hashable]]:
+        """
+        Find the geometries closest to a point.
+
+        Grid cells are visited in growing rings around the point until the `k`
+        closest geometries are known for certain. Only the cells of each ring within
+        the bounds of the data are visited, starting from the first ring reaching
+        them, so the work depends on the extent of the data, not on the distance of
+        the point.
+
+        Args:
+            lon: Longitude of the point.
+            lat: Latitude of the point.
+            k: Number of geometries to return.
+            max_distance_km: Ignore geometries further away than this.
+
+        Returns:
+            Up to `k` `(distance_km, key)` pairs, closest first.
+        """
+        if self._bounds is None:
+            return []
+
+        cx, cy = self._cell(self._project(lon, lat))
+        bx0, by0, bx1, by1 = self._bounds
+        min_ring = max(0, bx0 - cx, cx - bx1, by0 - cy, cy - by1)
+        max_ring = max(abs(cx - bx0), abs(cx - bx1), abs(cy - by0), abs(cy - by1))
+
+        distances: dict[Hashable, float] = {}
+        for ring in range(min_ring, max_ring + 1):
+            for x, y in self._ring_cells(cx, cy, ring):
+                for key in self._cells.get((x, y), ()):
+                    if key not in distances:
+                        distances[key] = self.distance_km(key, lon, lat)
+
+            # every geometry within `reach` of the point has been seen
+            reach = ring * self.cell_size
+            found = sorted(distances.values())
+            if len(found) >= k and found[k - 1] <= reach:
+                break
+            if max_distance_km is not None and reach >= max_distance_km:
+                break
+
+        results = sorted((distance, key) for key, distance in distances.items())
+        if max_distance_km is not None:
+            results = [r for r in results if r[0] <= max_distance_km]
+        return results[:k]
+
+    def within_bbox(
+        self, min_lon: float, min_lat: float, max_lon: float, max_lat: float
+    ) -> list[Hashable]:
+        """
+        Find the geometries intersecting a bounding box.
+
+        Args:
+            min_lon: Western edge of the box.
+            min_lat: Southern edge of the box.
+            max_lon: Eastern edge of the box.
+            max_lat: Northern edge of the box.
+
+        Returns:
+            The keys of the intersecting geometries, in insertion order.
+        """
+        if self._bounds is None:
+            return []
+
+        (x0, y0), (x1, y1) = (
+            self._project(min_lon, min_lat),
+            self._project(max_lon, max_lat),
+        )
+        rect = (x0, y0, x1, y1)
+        (cx0, cy0), (cx1, cy1) = self._cell([x0, y0]), self._cell([x1, y1])
+        bx0, by0, bx1, by1 = self._bounds
+
+        candidates: set[Hashable] = set()
+        for cx in range(max(cx0, bx0), min(cx1, bx1) + 1):
+            for cy in range(max(cy0, by0), min(cy1, by1) + 1):
+                candidates.update(self._cells.get((cx, cy), ()))
+
+        matches = [
+            key
+            for key in candidates
+            if any(
+                _segment_intersects_rect(start, end, rect)
+                for start, end in self._segments(key)
+            )
+        ]
+        return sorted(matches, key=self._order.__getitem__)
@@ -0,0 +1,273 @@
+"""
+Shared asynchronous HTTP helpers for provider modules.
+
+Provider fetch functions should go through `fetch_json` instead of calling `httpx`
+directly, so that upstream requests never block the MCP server event loop and
+concurrent tool calls can overlap.
+
+Each provider can additionally open a long-lived pooled client with `http_client`
+when its server starts, so that keep-alive connections (and TLS sessions) to the
+upstream API are reused across tool calls.
+
+Large downloads should use `stream_response` or `iter_json_lines`, which consume
+the body incrementally instead of loading it into memory.
+
+Requests can be throttled per provider, and per endpoint, by registering an
+`UpstreamLimiter` with `set_limiter`. Transient failures are retried according to a
+`RetryPolicy`, configured with the `ODMCP_RETRY_*` environment variables.
+"""
+
+import json
+import logging
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncIterator, ClassVar
+
+import httpx
+from pydantic import Field
+
+from odmcp.config import EnvConfig
+from odmcp.ratelimit import UpstreamLimiter
+from odmcp.retry import RetryPolicy
+
+log = logging.getLogger(__name__)
+
+# pooled clients opened by `http_client`, keyed by provider name
+_CLIENTS: dict[str, httpx.AsyncClient] = {}
+
+# upstream limiters registered by `set_limiter`, keyed by provider name then by
+# endpoint URL prefix (None for the limiter applying to every request)
+_LIMITERS: dict[str, dict[str | None, UpstreamLimiter]] = {}
+
+# retry policy of the requests made without an explicit policy
+DEFAULT_RETRY_POLICY = RetryPolicy.from_env()
+
+
+class HTTPClientConfig(EnvConfig):
+    """Connection pool settings of a provider HTTP client."""
+
+    env_prefix: ClassVar[str] = "ODMCP_HTTP_"
+
+    max_connections: int = Field(
+        default=20, ge=1, description="Maximum number of concurrent connections"
+    )
+    max_keepalive_connections: int = Field(
+        default=10, ge=0, description="Maximum number of idle keep-alive connections"
+    )
+    keepalive_expiry: float = Field(
+        default=30.0,
+        ge=0,
+        description="Seconds an idle keep-alive connection is kept open",
+    )
+    timeout: float = Field(default=30.0, gt=0, description="Request timeout in seconds")
+    http2: bool = Field(
+        default=False, description="Use HTTP/2 (requires the 'http2' extra)"
+    )
+
+
+def create_http_client(config: HTTPClientConfig | None = None) -> httpx.AsyncClient:
+    """
+    Create a pooled async HTTP client.
+
+    Args:
+        config: The pool settings, read from the environment if not given.
+
+    Returns:
+        The created client. The caller is responsible for closing it.
+    """
+    config = config or HTTPClientConfig.from_env()
+
+    http2 = config.http2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            log.warning("HTTP/2 requested but 'h2' is not installed, using HTTP/1.1")
+            http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=config.timeout,
+        limits=httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+        ),
+    )
+
+
+@asynccontextmanager
+async def http_client(
+    provider: str, config: HTTPClientConfig | None = None
+) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Open the pooled client of a provider for the lifetime of the context.
+
+    While the context is open, `fetch_json` calls made with the same `provider`
+    reuse the client connections. Meant to wrap the server run in `main()`.
+
+    Args:
+        provider: The provider name the client is registered under.
+        config: The pool settings, read from the environment if not given.
+
+    Yields:
+        The pooled client.
+    """
+    client = create_http_client(config)
+    _CLIENTS[provider] = client
+    try:
+        yield client
+    finally:
+        if _CLIENTS.get(provider) is client:
+            del _CLIENTS[provider]
+        await client.aclose()
+
+
+def set_limiter(
+    provider: str, limiter: UpstreamLimiter | None, endpoint: str | None = None
+) -> None:
+    """
+    Throttle the requests made on behalf of a provider.
+
+    Args:
+        provider: The provider name passed to `fetch_json` and `stream_response`.
+        limiter: The limiter to apply, or None to remove it.
+        endpoint: Only apply the limiter to URLs starting with this prefix. The
+            provider wide limiter (endpoint None) applies in addition.
+    """
+    limiters = _LIMITERS.setdefault(provider, {})
+    if limiter is None:
+        limiters.pop(endpoint, None)
+    else:
+        limiters[endpoint] = limiter
+
+
+def get_limiter(provider: str, endpoint: str | None = None) -> UpstreamLimiter | None:
+    """Return the limiter registered for a provider and endpoint prefix, if any."""
+    return _LIMITERS.get(provider, {}).get(endpoint)
+
+
+@asynccontextmanager
+async def _limited(url: str, provider: str | None) -> AsyncIterator[None]:
+    """Hold a slot of every limiter matching the request for the context."""
+    limiters = _LIMITERS.get(provider) if provider else None
+    if not limiters:
+        yield
+        return
+
+    async with AsyncExitStack() as stack:
+        for endpoint, limiter in limiters.items():
+            if endpoint is None or url.startswith(endpoint):
+                await stack.enter_async_context(limiter.acquire())
+        yield
+
+
+async def fetch_json(
+    url: str,
+    params: dict[str, Any] | None = None,
+    provider: str | None = None,
+    retry: RetryPolicy | None = None,
+) -> Any:
+    """
+    Fetch a JSON document with a non-blocking GET request.
+
+    Args:
+        url: The URL to fetch.
+        params: The query parameters to send with the request.
+        provider: The provider whose pooled client and limiters should be used.
+            A one-off client is used when the provider has no open pool.
+        retry: The retry policy, `DEFAULT_RETRY_POLICY` if not given.
+
+    Returns:
+        The decoded JSON body of the response.
+
+    Raises:
+        httpx.HTTPError: If the API request fails
+        TimeoutError: If the retry policy deadline expires
+    """
+
+    async def attempt() -> httpx.Response:
+        client = _CLIENTS.get(provider) if provider else None
+        async with _limited(url, provider):
+            if client is None:
+                async with httpx.AsyncClient() as client:
+                    response = await client.get(url, params=params)
+            else:
+                response = await client.get(url, params=params)
+        response.raise_for_status()
+        return response
+
+    response = await (retry or DEFAULT_RETRY_POLICY).call(attempt)
+    return response.json()
+
+
+@asynccontextmanager
+async def stream_response(
+    url: str,
+    params: dict[str, Any] | None = None,
+    provider: str | None = None,
+    retry: RetryPolicy | None = None,
+) -> AsyncIterator[httpx.Response]:
+    """
+    Open a streamed GET request, the body is read incrementally by the caller.
+
+    Only opening the request is retried: once the body is being consumed, errors
+    are raised to the caller.
+
+    Args:
+        url: The URL to fetch.
+        params: The query parameters to send with the request.
+        provider: The provider whose pooled client and limiters should be used.
+            A one-off client is used when the provider has no open pool. The
+            limiter slot is held until the body has been consumed.
+        retry: The retry policy, `DEFAULT_RETRY_POLICY` if not given.
+
+    Yields:
+        The response, with its body not yet read.
+
+    Raises:
+        httpx.HTTPError: If the API request fails
+        TimeoutError: If the retry policy deadline expires
+    """
+
+    async def attempt() -> tuple[AsyncExitStack, httpx.Response]:
+        client = _CLIENTS.get(provider) if provider else None
+        stack = AsyncExitStack()
+        try:
+            await stack.enter_async_context(_limited(url, provider))
+            if client is None:
+                client = await stack.enter_async_context(httpx.AsyncClient())
+            response = await stack.enter_async_context(
+                client.stream("GET", url, params=params)
+            )
+            response.raise_for_status()
+        except BaseException:
+            await stack.aclose()
+            raise
+        return stack, response
+
+    stack, response = await (retry or DEFAULT_RETRY_POLICY).call(attempt)
+    async with stack:
+        yield response
+
+
+async def iter_json_lines(
+    url: str, params: dict[str, Any] | None = None, provider: str | None = None
+) -> AsyncIterator[Any]:
+    """
+    Stream a JSON Lines document, decoding one line at a time.
+
+    Args:
+        url: The URL to fetch.
+        params: The query parameters to send with the request.
+        provider: The provider whose pooled client should be used.
+
+    Yields:
+        The decoded JSON value of each non-empty line.
+
+    Raises:
+        httpx.HTTPError: If the API request fails
+    """
+    async with stream_response(url, params, provider) as response:
+        async for line in response.aiter_lines():
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,458 @@
+"""
+Local evaluation of a subset of ODSQL, the query language of the Explore API.
+
+Providers keeping a snapshot of a dataset in memory can answer the `select`,
+`where`, `group_by` and `order_by` parameters of a tool call without a round-trip to
+the upstream API. Queries are compiled once into Python functions and evaluated
+over the snapshot records.
+
+The supported subset is:
+
+- `where`: comparisons (`=`, `!=`, `<`, `<=`, `>`, `>=`) between a field and a
+  literal, `IS [NOT] NULL`, combined with `AND`, `OR`, `NOT` and parentheses.
+- `select`: field names with an optional `AS` alias, `*`, and the `count`, `sum`,
+  `avg`, `min` and `max` aggregates.
+- `group_by`: field names.
+- `order_by`: field names or select aliases, each with `ASC` or `DESC`.
+
+Anything else, e.g. functions, full-text search or `LIKE`, raises `UnsupportedQuery`
+so that the caller can send the query upstream instead.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Iterable
+
+Record = dict[str, Any]
+Predicate = Callable[[Record], bool]
+
+AGGREGATES = ("count", "sum", "avg", "min", "max")
+
+_TOKEN = re.compile(
+    r"""\s*(?:
+        (?P<number>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+        |(?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+        |(?P<field>`[^`]+`)
+        |(?P<op><=|>=|!=|<>|=|<|>)
+        |(?P<punct>[(),*-])
+        |(?P<name>[A-Za-z_][A-Za-z0-9_.]*)
+    )""",
+    re.VERBOSE,
+)
+
+_DIRECTION = re.compile(r"(.*?)(?:\s+(asc|desc))?\s*$", re.IGNORECASE | re.DOTALL)
+
+_KEYWORDS = {"and", "or", "not", "is", "null", "true", "false", "asc", "desc", "as"}
+
+_COMPARATORS: dict[str, Callable[[Any, Any], bool]] = {
+    "=": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<>": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+
+
+class UnsupportedQuery(ValueError):
+    """The query uses ODSQL features that cannot be evaluated locally."""
+
+
+def _tokenize(text: str) -> list[tuple[str, str]]:
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None or match.end() == position:
+            raise UnsupportedQuery(f"Unexpected character in {text!r}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent parser over the tokens of one clause."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.position = 0
+
+    def peek(self) -> tuple[str, str] | None:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def next(self) -> tuple[str, str]:
+        token = self.peek()
+        if token is None:
+            raise UnsupportedQuery(f"Unexpected end of {self.text!r}")
+        self.position += 1
+        return token
+
+    def accept_keyword(self, *keywords: str) -> str | None:
+        token = self.peek()
+        if token and token[0] == "name" and token[1].lower() in keywords:
+            self.position += 1
+            return token[1].lower()
+        return None
+
+    def expect(self, kind: str, value: str | None = None) -> str:
+        token = self.next()
+        if token[0] != kind or (value is not None and token[1] != value):
+            raise UnsupportedQuery(f"Unsupported syntax in {self.text!r}")
+        return token[1]
+
+    def done(self) -> None:
+        if self.peek() is not None:
+            raise UnsupportedQuery(f"Unsupported syntax in {self.text!r}")
+
+    def field(self) -> str:
+        kind, value = self.next()
+        if kind == "field":
+            return value[1:-1]
+        if kind != "name" or value.lower() in _KEYWORDS:
+            raise UnsupportedQuery(f"Expected a field name in {self.text!r}")
+        if self.peek() == ("punct", "("):
+            raise UnsupportedQuery(f"Unsupported function {value}() in {self.text!r}")
+        return value
+
+    def literal(self) -> Any:
+        kind, value = self.next()
+        negative = kind == "punct" and value == "-"
+        if negative:
+            kind, value = self.next()
+        if kind == "number":
+            number = float(value) if any(c in value for c in ".eE") else int(value)
+            return -number if negative else number
+        if negative:
+            raise UnsupportedQuery(f"Unsupported expression in {self.text!r}")
+        if kind == "string":
+            return re.sub(r"\\(.)", r"\1", value[1:-1])
+        if kind == "name" and value.lower() in ("true", "false"):
+            return value.lower() == "true"
+        raise UnsupportedQuery(f"Expected a literal in {self.text!r}")
+
+    # where := or_expr
+    def or_expr(self) -> Predicate:
+        operands = [self.and_expr()]
+        while self.accept_keyword("or"):
+            operands.append(self.and_expr())
+        if len(operands) == 1:
+            return operands[0]
+        if len(operands) == 2:
+            first, second = operands
+            return lambda record: first(record) or second(record)
+        return lambda record: any(operand(record) for operand in operands)
+
+    def and_expr(self) -> Predicate:
+        operands = [self.not_expr()]
+        while self.accept_keyword("and"):
+            operands.append(self.not_expr())
+        if len(operands) == 1:
+            return operands[0]
+        if len(operands) == 2:
+            first, second = operands
+            return lambda record: first(record) and second(record)
+        return lambda record: all(operand(record) for operand in operands)
+
+    def not_expr(self) -> Predicate:
+        if self.accept_keyword("not"):
+            operand = self.not_expr()
+            return lambda record: not operand(record)
+        if self.peek() == ("punct", "("):
+            self.next()
+            predicate = self.or_expr()
+            self.expect("punct", ")")
+            return predicate
+        return self.comparison()
+
+    def comparison(self) -> Predicate:
+        field = self.field()
+        if self.accept_keyword("is"):
+            negate = self.accept_keyword("not") is not None
+            if self.accept_keyword("null") is None:
+                raise UnsupportedQuery(f"Expected NULL in {self.text!r}")
+            if negate:
+                return lambda record: record.get(field) is not None
+            return lambda record: record.get(field) is None
+
+        kind, op = self.next()
+        if kind != "op":
+            raise UnsupportedQuery(f"Unsupported operator {op!r} in {self.text!r}")
+        literal = self.literal()
+        compare = _COMPARATORS[op]
+        # values of another type never match, e.g. a text field compared with a
+        # number (booleans are ints for Python, they are kept apart)
+        types = (bool,) if isinstance(literal, bool) else (type(literal),)
+        if isinstance(literal, (int, float)) and not isinstance(literal, bool):
+            types = (int, float)
+
+        def predicate(record: Record) -> bool:
+            value = record.get(field)
+            return (
+                value.__class__ in types
+                or (isinstance(value, types) and not isinstance(value, bool))
+            ) and compare(value, literal)
+
+        return predicate
+
+
+def _split(clause: str) -> list[str]:
+    """Split a clause on the commas outside parentheses and quotes."""
+    items, depth, start, quote = [], 0, 0, None
+    for i, char in enumerate(clause):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "\"'`":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            items.append(clause[start:i].strip())
+            start = i + 1
+    items.append(clause[start:].strip())
+    if not all(items):
+        raise UnsupportedQuery(f"Empty item in {clause!r}")
+    return items
+
+
+@dataclass(frozen=True)
+class SelectItem:
+    """One item of a select clause, `function` is set for aggregates."""
+
+    key: str  # the name of the item in the results
+    field: str | None  # None for `count(*)` and `*`
+    function: str | None = None
+
+
+def _parse_select_item(text: str) -> SelectItem:
+    parser = _Parser(text)
+    if parser.peek() == ("punct", "*"):
+        parser.next()
+        parser.done()
+        return SelectItem(key="*", field=None)
+
+    kind, value = parser.peek() or ("", "")
+    function = None
+    if (
+        kind == "name"
+        and value.lower() in AGGREGATES
+        and parser.tokens[1:2] == [("punct", "(")]
+    ):
+        function = value.lower()
+        parser.position += 2
+        if function == "count" and parser.peek() == ("punct", "*"):
+            parser.next()
+            field = None
+        else:
+            field = parser.field()
+        parser.expect("punct", ")")
+    else:
+        field = parser.field()
+
+    key = text if function else field
+    if parser.accept_keyword("as"):
+        key = parser.field()
+    parser.done()
+    return SelectItem(key=key, field=field, function=function)
+
+
+def _aggregate(function: str, field: str | None, records: list[Record]) -> Any:
+    if field is None:
+        return len(records)
+    values = [record[field] for record in records if record.get(field) is not None]
+    if function == "count":
+        return len(values)
+    if not values:
+        return None
+    if function in ("sum", "avg"):
+        if not all(
+            isinstance(value, (int, float)) and not isinstance(value, bool)
+            for value in values
+        ):
+            raise UnsupportedQuery(f"Cannot compute {function}({field}) on non-numbers")
+        total = sum(values)
+        return total / len(values) if function == "avg" else total
+    try:
+        return min(values) if function == "min" else max(values)
+    except TypeError:
+        raise UnsupportedQuery(f"Cannot compute {function}({field}) on mixed types")
+
+
+def _sort_key(value: Any) -> tuple:
+    """Order values of mixed types: numbers, then text, then anything else."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (0, value)
+    if isinstance(value, str):
+        return (1, value)
+    return (2, json.dumps(value, sort_keys=True, default=str))
+
+
+def _hashable(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True)
+    return value
+
+
+@dataclass(frozen=True)
+class Query:
+    """A compiled ODSQL query, see `compile_query`."""
+
+    predicate: Predicate | None
+    select: tuple[SelectItem, ...] | None
+    group_by: tuple[str, ...] | None
+    order_by: tuple[tuple[str, bool], ...]  # (field, descending)
+
+    def _group(self, records: list[Record]) -> list[Record]:
+        groups: dict[tuple, list[Record]] = {}
+        for record in records:
+            key = tuple(_hashable(record.get(field)) for field in self.group_by or ())
+            groups.setdefault(key, []).append(record)
+        if not self.group_by and not groups:
+            groups[()] = []  # aggregates over no records, e.g. count(*) = 0
+
+        items = self.select or tuple(SelectItem(key=f, field=f) for f in self.group_by)
+        rows = []
+        for members in groups.values():
+            row = {}
+            for item in items:
+                if item.function:
+                    row[item.key] = _aggregate(item.function, item.field, members)
+                else:
+                    row[item.key] = members[0].get(item.field)
+            rows.append(row)
+
+        # groups are returned ordered by their values, as the Explore API does
+        for field in reversed(self.group_by or ()):
+            key = next(
+                (i.key for i in items if i.field == field and not i.function), None
+            )
+            if key is not None:
+                rows.sort(key=lambda row: (row[key] is None, _sort_key(row[key])))
+        return rows
+
+    def _sort(self, rows: list[Record]) -> list[Record]:
+        for field, descending in reversed(self.order_by):
+            present = [row for row in rows if row.get(field) is not None]
+            missing = [row for row in rows if row.get(field) is None]
+            present.sort(key=lambda row: _sort_key(row[field]), reverse=descending)
+            rows = present + missing  # missing values always last
+        return rows
+
+    def run(
+        self, records: Iterable[Record], limit: int = 10, offset: int = 0
+    ) -> dict[str, Any]:
+        """
+        Evaluate the query over records.
+
+        Args:
+            records: The dataset records.
+            limit: Maximum number of results, -1 for all.
+            offset: Number of results to skip.
+
+        Returns:
+            A response shaped like the Explore API records endpoint, with the
+            `total_count` of matching records (or groups) and the page of `results`.
+
+        Raises:
+            UnsupportedQuery: If an aggregate cannot be computed over the values of
+                the records, e.g. the average of text values.
+        """
+        rows = (
+            [r for r in records if self.predicate(r)]
+            if self.predicate
+            else list(records)
+        )
+
+        grouped = self.group_by is not None or any(
+            item.function for item in self.select or ()
+        )
+        if grouped:
+            rows = self._group(rows)
+        if self.order_by:
+            rows = self._sort(rows)
+
+        total_count = len(rows)
+        rows = rows[offset:] if limit < 0 else rows[offset : offset + limit]
+        if self.select and not grouped and all(item.key != "*" for item in self.select):
+            rows = [
+                {item.key: row.get(item.field) for item in self.select} for row in rows
+            ]
+        return {"total_count": total_count, "results": rows}
+
+
+@lru_cache(maxsize=256)
+def compile_query(
+    select: str | None = None,
+    where: str | None = None,
+    group_by: str | None = None,
+    order_by: str | None = None,
+) -> Query:
+    """
+    Compile the ODSQL clauses of a query for local evaluation.
+
+    Args:
+        select: The select clause, e.g. 'fahrzeug_typ, avg(vmax) as vmax'.
+        where: The where clause, e.g. 'vmax >= 160 AND fahrzeug_typ = "Re 460"'.
+        group_by: The group by clause, e.g. 'fahrzeug_typ'.
+        order_by: The order by clause, e.g. 'vmax DESC'.
+
+    Returns:
+        The compiled query.
+
+    Raises:
+        UnsupportedQuery: If a clause uses syntax outside the supported subset.
+    """
+    predicate = None
+    if where and where.strip():
+        parser = _Parser(where)
+        predicate = parser.or_expr()
+        parser.done()
+
+    items = None
+    if select and select.strip():
+        items = tuple(_parse_select_item(item) for item in _split(select))
+
+    groups = None
+    if group_by and group_by.strip():
+        groups = tuple(_Parser(item).field() for item in _split(group_by))
+        for item in items or ():
+            if not item.function and item.field not in groups:
+                raise UnsupportedQuery(f"{item.key} is neither grouped nor aggregated")
+    elif items and any(item.function for item in items):
+        if not all(item.function for item in items):
+            raise UnsupportedQuery("Aggregates mixed with fields require a group_by")
+
+    order = []
+    keys = {item.key for item in items or ()}
+    # records are sorted before their projection, by the fields the aliases select
+    grouped = groups is not None or any(item.function for item in items or ())
+    aliases = {
+        item.key: item.field
+        for item in (() if grouped else items or ())
+        if item.key != "*"
+    }
+    if order_by and order_by.strip():
+        for item in _split(order_by):
+            expression, direction = _DIRECTION.match(item).groups()
+            if expression in aliases:
+                expression = aliases[expression]
+            elif expression not in keys:  # aggregates are ordered by their key
+                parser = _Parser(expression)
+                expression = parser.field()
+                parser.done()
+            if grouped and expression not in (keys if items else groups):
+                # groups only have the selected or grouped fields
+                raise UnsupportedQuery(f"Cannot order groups by {expression}")
+            order.append((expression, (direction or "").lower() == "desc"))
+
+    return Query(predicate, items, groups, tuple(order))
@@ -22,14 +22,18 @@ Usage:
 import logging
 from typing import Any, List, Optional, Sequence
 
-import httpx
 import mcp.types as types
-from pydantic import BaseModel, Field
+from pydantic import Field
+
+from odmcp.formatting import format_response
+from odmcp.http import fetch_json
+from odmcp.schemas import DeferredModel, model_json_schema
 
 # Initialize logging
 log = logging.getLogger(__name__)
 
 # 2. Constants Section
+PROVIDER = "xx_example"  # module name, also keys the provider pooled HTTP client
 BASE_URL = "https://api.example.com/v1"
 
 # 3. Registration Variables
@@ -48,28 +52,28 @@ TOOLS_HANDLERS: dict[
 
 
 # 1. Input/Output Models
-class EndpointParams(BaseModel):
+class EndpointParams(DeferredModel):
     """Input parameters for the endpoint."""
 
     param1: str = Field(..., description="Description of param1")
     param2: Optional[int] = Field(None, description="Description of param2")
 
 
-class EndpointResult(BaseModel):
+class EndpointResult(DeferredModel):
     """Single result item from the endpoint."""
 
     field1: str = Field(..., description="Description of field1")
     field2: int = Field(..., description="Description of field2")
 
 
-class EndpointResponse(BaseModel):
+class EndpointResponse(DeferredModel):
     """Complete response from the endpoint."""
 
     results: List[EndpointResult] = Field(..., description="List of results")
 
 
 # 2. Data Fetching Function
-def fetch_endpoint_data(params: EndpointParams) -> EndpointResponse:
+async def fetch_endpoint_data(params: EndpointParams) -> EndpointResponse:
     """
     Fetch data from the endpoint.
 
@@ -83,9 +87,10 @@ def fetch_endpoint_data(params: EndpointParams) -> EndpointResponse:
         httpx.HTTPError: If the API request fails
     """
     endpoint = f"{BASE_URL}/endpoint"
-    response = httpx.get(endpoint, params=params.model_dump(exclude_none=True))
-    response.raise_for_status()
-    return EndpointResponse(**response.json())
+    data = await fetch_json(
+        endpoint, params=params.model_dump(exclude_none=True), provider=PROVIDER
+    )
+    return EndpointResponse(**data)
 
 
 # 3. Handler Function
@@ -105,8 +110,8 @@ async def handle_endpoint(
         Exception: If the handling fails
     """
     try:
-        response = fetch_endpoint_data(EndpointParams(**(arguments or {})))
-        return [types.TextContent(type="text", text=str(response))]
+        response = await fetch_endpoint_data(EndpointParams(**(arguments or {})))
+        return [types.TextContent(type="text", text=format_response(response))]
     except Exception as e:
         log.error(f"Error handling endpoint: {e}")
         raise
@@ -117,7 +122,7 @@ TOOLS.append(
     types.Tool(
         name="endpoint-name",
         description="Description of what this endpoint does",
-        inputSchema=EndpointParams.model_json_schema(),
+        inputSchema=model_json_schema(EndpointParams),
     )
 )
 TOOLS_HANDLERS["endpoint-name"] = handle_endpoint
@@ -16,27 +16,207 @@ Usage:
 """
 
 import logging
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, List, Optional, Sequence
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    TYPE_CHECKING,
+)
 
-import httpx
+import anyio
 import mcp.types as types
-from mcp.server import stdio_server
-from pydantic import BaseModel, Field
+from anyio.abc import TaskGroup
+from pydantic import AnyUrl, BaseModel, Field, computed_field, model_validator
+
+from odmcp.cache import DiskCache, SingleFlight, TTLCache, make_cache_key
+from odmcp.formatting import OutputFormat, format_response, select_fields
+from odmcp.http import (
+    fetch_json,
+    http_client,
+    iter_json_lines,
+    set_limiter,
+    stream_response,
+)
+from odmcp.ratelimit import RateLimitConfig, UpstreamLimiter
+from odmcp.schemas import DeferredModel, model_json_schema
+from odmcp.subscriptions import SUBSCRIPTIONS
+
+if sys.version_info < (3, 11):
+    from exceptiongroup import ExceptionGroup
+
+if TYPE_CHECKING:
+    from odmcp.geo import Coordinates
 
 log = logging.getLogger(__name__)
 
+PROVIDER = "ch_sbb"
 BASE_URL = "https://data.sbb.ch/api/explore/v2.1"
 
 # Registration Variables
 RESOURCES: List[Any] = []  # resources that will be registered by each endpoints
 RESOURCES_HANDLERS: dict[
     str, Any
-] = {}  # resources handlers that will be registered by each endpoints
+] = {}  # resources handlers by URI template, registered by each endpoints
+RESOURCE_TEMPLATES: List[types.ResourceTemplate] = []  # templates listed to clients
 TOOLS: List[types.Tool] = []  # tools that will be registered by each endpoints
 TOOLS_HANDLERS: dict[
     str, Any
 ] = {}  # tools handlers that will be registered by each endpoints
+TOOLS_TIMEOUTS: dict[str, float] = {}  # deadline in seconds of each tool call
+
+# Response cache shared by all endpoints, with a time-to-live per tool in seconds.
+# Set ODMCP_CACHE_DIR to persist responses across server processes.
+CACHE = TTLCache(maxsize=256, disk=DiskCache.from_env(PROVIDER))
+CACHE_TTLS: dict[str, float] = {
+    "rail-traffic-info": 60,  # disruptions are updated continuously
+    "railway-lines": 24 * 60 * 60,  # `linie` changes about once a day
+    "rolling-stock": 24 * 60 * 60,  # `rollmaterial` changes about once a day
+    "rail-traffic-info-facets": 60 * 60,
+    "railway-lines-facets": 24 * 60 * 60,
+    "rolling-stock-facets": 24 * 60 * 60,
+}
+# Tools answered from expired entries while they are refreshed in the background,
+# with the number of seconds an entry may be served after its expiry. Responses
+# served this way are flagged with `stale: true`.
+CACHE_MAX_STALE: dict[str, float] = {
+    "railway-lines": 7 * 24 * 60 * 60,
+    "rolling-stock": 7 * 24 * 60 * 60,
+    "railway-lines-facets": 7 * 24 * 60 * 60,
+    "rolling-stock-facets": 7 * 24 * 60 * 60,
+}
+
+# Task group of the provider background tasks, open while `lifespan()` runs
+BACKGROUND_TASKS: TaskGroup | None = None
+
+# Throttle of the requests sent to the Explore API, shared by all tool calls so that
+# concurrent pagination and prefetching queue here instead of triggering HTTP 429.
+# Tuned with the ODMCP_UPSTREAM_* environment variables.
+UPSTREAM_LIMITER = UpstreamLimiter(RateLimitConfig.from_env())
+set_limiter(PROVIDER, UPSTREAM_LIMITER)
+
+# Tool parameters handled by this module, never sent to the Explore API
+TOOL_ONLY_PARAMS = {
+    "aggregates",
+    "max_records",
+    "max_values",
+    "output_format",
+    "geometry",
+    "geometry_tolerance",
+    "coordinate_precision",
+}
+
+# Pagination limits of the Explore API records endpoint
+PAGE_SIZE = 100
+MAX_OFFSET = 10000  # offset + limit may not exceed this value
+PAGE_CONCURRENCY = 4  # pages fetched in parallel by a single tool call
+
+
+async def _fetch_cached(tool: str, endpoint: str, params: BaseModel) -> Any:
+    """
+    Fetch an endpoint through the response cache.
+
+    Args:
+        tool: The tool name, selecting the cache time-to-live.
+        endpoint: The endpoint URL.
+        params: The validated tool parameters, sent as query parameters.
+
+    Returns:
+        The decoded JSON response, possibly served from the cache. A response
+        served stale (see `CACHE_MAX_STALE`) has a `stale` key set to True.
+    """
+    query = params.model_dump(exclude_none=True, exclude=TOOL_ONLY_PARAMS)
+    key = make_cache_key(endpoint, query)
+
+    async def fetch() -> Any:
+        return await fetch_json(endpoint, params=query, provider=PROVIDER)
+
+    if tool not in CACHE_MAX_STALE:
+        return await CACHE.get_or_fetch(key, fetch, ttl=CACHE_TTLS[tool])
+
+    data, stale = await CACHE.get_or_revalidate(
+        key, fetch, CACHE_TTLS[tool], CACHE_MAX_STALE[tool], BACKGROUND_TASKS
+    )
+    return {**data, "stale": True} if stale else data
+
+
+async def _fetch_records(tool: str, endpoint: str, params: BaseModel) -> Any:
+    """
+    Fetch records from a dataset, paging through the results if requested.
+
+    When `params.max_records` is set, the first page gives the `total_count` and the
+    remaining pages are fetched concurrently (at most `PAGE_CONCURRENCY` at a time),
+    then merged in order. Otherwise a single page of `params.limit` records is
+    fetched.
+
+    Args:
+        tool: The tool name, selecting the cache time-to-live.
+        endpoint: The dataset records endpoint URL.
+        params: The validated tool parameters.
+
+    Returns:
+        The decoded JSON response with `total_count` and the merged `results`, and
+        `stale` set to True if any page was served stale.
+    """
+    max_records = getattr(params, "max_records", None)
+    if max_records is None:
+        return await _fetch_cached(tool, endpoint, params)
+
+    start = params.offset
+    end = min(start + max_records, MAX_OFFSET)
+    first_limit = max(1, min(PAGE_SIZE, end - start))
+    first = await _fetch_cached(
+        tool, endpoint, params.model_copy(update={"limit": first_limit})
+    )
+
+    end = min(end, first["total_count"])
+    offsets = range(start + first_limit, end, PAGE_SIZE)
+    pages: list[list[Any]] = [[] for _ in offsets]
+    stale = first.get("stale", False)
+    limiter = anyio.CapacityLimiter(PAGE_CONCURRENCY)
+
+    async def fetch_page(index: int, offset: int) -> None:
+        nonlocal stale
+        page_params = params.model_copy(
+            update={"offset": offset, "limit": min(PAGE_SIZE, end - offset)}
+        )
+        async with limiter:
+            page = await _fetch_cached(tool, endpoint, page_params)
+        pages[index] = page["results"]
+        stale = stale or page.get("stale", False)
+
+    try:
+        async with anyio.create_task_group() as tg:
+            for index, offset in enumerate(offsets):
+                tg.start_soon(fetch_page, index, offset)
+    except ExceptionGroup as group:
+        # fail with the error of the page, as a single page call would
+        raise group.exceptions[0] from None
+
+    results = list(first["results"])
+    for page in pages:
+        results.extend(page)
+    data = {"total_count": first["total_count"], "results": results}
+    return {**data, "stale": True} if stale else data
+
+
+def _to_text_content(response: BaseModel, params: BaseModel) -> list[types.TextContent]:
+    """Render a response in the output format requested by the tool parameters."""
+    text = format_response(
+        response, params.output_format, select_fields(getattr(params, "select", None))
+    )
+    return [types.TextContent(type="text", text=text)]
 
 
 ###################
@@ -45,7 +225,7 @@ TOOLS_HANDLERS: dict[
 
 
 # 1. define models for the input / output
-class TrafficInfoParams(BaseModel):
+class TrafficInfoParams(DeferredModel):
     select: Optional[str] = Field(
         None,
         description="Fields to select in the response. Examples: 'title,description' for basic info, 'title,validitybegin,validityend' for timing info",
@@ -73,6 +253,16 @@ class TrafficInfoParams(BaseModel):
         ge=0,
         description="Number of traffic info entries to skip for pagination",
     )
+    max_records: Optional[int] = Field(
+        None,
+        ge=1,
+        le=MAX_OFFSET,
+        description="Fetch up to this many traffic info entries in one call by paging through the API (overrides limit, starts at offset)",
+    )
+    output_format: OutputFormat = Field(
+        default="json",
+        description="Output format: 'json' (compact), or 'csv' / 'tsv' for a table of the results",
+    )
     refine: Optional[str] = Field(
         None,
         description="Refine by specific facets. Example: 'author:SBB' to show only SBB notifications",
@@ -97,7 +287,7 @@ class TrafficInfoParams(BaseModel):
     )
 
 
-class TrafficInfoResult(BaseModel):
+class TrafficInfoResult(DeferredModel):
     title: Optional[str] = Field(default=None, description="Title of the traffic info")
     link: Optional[str] = Field(default=None, description="URL to more details")
     description: Optional[str] = Field(
@@ -120,13 +310,13 @@ class TrafficInfoResult(BaseModel):
     )
 
 
-class TrafficInfoResponse(BaseModel):
+class TrafficInfoResponse(DeferredModel):
     total_count: int = Field(description="Total number of results available")
     results: List[TrafficInfoResult] = Field(description="List of traffic info items")
 
 
 # 2. define the function to fetch the data
-def fetch_rail_traffic_info(params: TrafficInfoParams) -> TrafficInfoResponse:
+async def fetch_rail_traffic_info(params: TrafficInfoParams) -> TrafficInfoResponse:
     """
     Fetch rail traffic information based on the provided parameters.
 
@@ -136,14 +326,11 @@ def fetch_rail_traffic_info(params: TrafficInfoParams) -> TrafficInfoResponse:
     Returns:
         TrafficInfoResponse object containing the results
     """
-    # Implementation here
-    ...
     endpoint = f"{BASE_URL}/catalog/datasets/rail-traffic-information/records"
-    response = httpx.get(endpoint, params=params.model_dump(exclude_none=True))
-
-    response.raise_for_status()
-
-    return TrafficInfoResponse(**response.json())
+    data = await _query_snapshot("rail-traffic-information", params)
+    if data is None:
+        data = await _fetch_records("rail-traffic-info", endpoint, params)
+    return TrafficInfoResponse(**data)
 
 
 # 3. register the function to run when the tool is called
@@ -151,8 +338,9 @@ async def handle_rail_traffic_info(
     arguments: dict[str, Any] | None = None,
 ) -> Sequence[types.TextContent | types.ImageContent | types.EmbeddedResource]:
     try:
-        traffic_info_response = fetch_rail_traffic_info(TrafficInfoParams(**arguments))
-        return [types.TextContent(type="text", text=str(traffic_info_response))]
+        params = TrafficInfoParams(**(arguments or {}))
+        traffic_info_response = await fetch_rail_traffic_info(params)
+        return _to_text_content(traffic_info_response, params)
     except Exception as e:
         log.error(f"Error fetching rail traffic info: {e}")
         raise
@@ -163,10 +351,11 @@ TOOLS.append(
     types.Tool(
         name="rail-traffic-info",
         description="Fetch rail traffic information",
-        inputSchema=TrafficInfoParams.model_json_schema(),
+        inputSchema=model_json_schema(TrafficInfoParams),
     )
 )
 TOOLS_HANDLERS["rail-traffic-info"] = handle_rail_traffic_info
+TOOLS_TIMEOUTS["rail-traffic-info"] = 30
 
 ###################
 # Railway Line Information
@@ -174,7 +363,7 @@ TOOLS_HANDLERS["rail-traffic-info"] = handle_rail_traffic_info
 
 
 # 1. define models for the input / output
-class RailwayLineParams(BaseModel):
+class RailwayLineParams(DeferredModel):
     select: Optional[str] = Field(
         None,
         description="Fields to select in the response. Examples: 'linie,linienname' for basic info, 'bpk_anfang,bpk_ende' for station info",
@@ -202,27 +391,59 @@ class RailwayLineParams(BaseModel):
         ge=0,
         description="Number of railway line entries to skip for pagination",
     )
+    max_records: Optional[int] = Field(
+        None,
+        ge=1,
+        le=MAX_OFFSET,
+        description="Fetch up to this many railway line entries in one call by paging through the API (overrides limit, starts at offset)",
+    )
+    output_format: OutputFormat = Field(
+        default="json",
+        description="Output format: 'json' (compact), or 'csv' / 'tsv' for a table of the results",
+    )
+    geometry: Literal["full", "simplified", "polyline", "none"] = Field(
+        default="full",
+        description="How to return line geometries (tst): 'full' coordinates, 'simplified' coordinates, 'polyline' for a simplified encoded polyline string, or 'none' to drop them",
+    )
+    geometry_tolerance: float = Field(
+        default=0.0001,
+        gt=0,
+        description="Simplification tolerance in degrees for 'simplified' and 'polyline' geometries (0.0001 is about 10 m)",
+    )
+    coordinate_precision: int = Field(
+        default=5,
+        ge=0,
+        le=8,
+        description="Decimals kept in 'simplified' and 'polyline' coordinates (5 is about 1 m)",
+    )
 
 
-class GeoPoint2D(BaseModel):
+class GeoPoint2D(DeferredModel):
     lon: float = Field(description="Longitude coordinate")
     lat: float = Field(description="Latitude coordinate")
 
 
-class LineGeometry(BaseModel):
-    coordinates: List[List[float]] = Field(
-        description="List of coordinate pairs [lon, lat]"
+class LineGeometry(DeferredModel):
+    coordinates: Optional[List[List[float]] | List[List[List[float]]]] = Field(
+        default=None,
+        description="List of coordinate pairs [lon, lat], one list per part for a MultiLineString",
+    )
+    encoded: Optional[str | List[str]] = Field(
+        default=None,
+        description="Encoded polyline of [lat, lon] pairs, with coordinate_precision decimals, one per part for a MultiLineString",
+    )
+    type: str = Field(
+        description="Geometry type (usually 'LineString', or 'MultiLineString')"
     )
-    type: str = Field(description="Geometry type (usually 'LineString')")
 
 
-class LineFeature(BaseModel):
+class LineFeature(DeferredModel):
     type: str = Field(description="Feature type")
     geometry: LineGeometry = Field(description="Line geometry information")
     properties: dict = Field(description="Additional properties")
 
 
-class RailwayLineResult(BaseModel):
+class RailwayLineResult(DeferredModel):
     linie: Optional[int] = Field(default=None, description="Line number")
     linienname: Optional[str] = Field(default=None, description="Line name/description")
     bpk_anfang: Optional[str] = Field(default=None, description="Starting station")
@@ -243,13 +464,57 @@ class RailwayLineResult(BaseModel):
     )
 
 
-class RailwayLineResponse(BaseModel):
+class RailwayLineResponse(DeferredModel):
     total_count: int = Field(description="Total number of results available")
     results: List[RailwayLineResult] = Field(description="List of railway line items")
+    stale: Optional[bool] = Field(
+        default=None,
+        description="True if served from an expired cache entry being refreshed",
+    )
 
 
 # 2. define the function to fetch the data
-def fetch_railway_lines(params: RailwayLineParams) -> RailwayLineResponse:
+def _reduce_line_geometry(
+    result: dict[str, Any], params: RailwayLineParams
+) -> dict[str, Any]:
+    """Apply the requested geometry mode to a raw railway line record."""
+    feature = result.get("tst")
+    if params.geometry == "full" or not feature:
+        return result
+    if params.geometry == "none":
+        return {key: value for key, value in result.items() if key != "tst"}
+
+    geometry = feature.get("geometry") or {}
+    coordinates = geometry.get("coordinates")
+    if geometry.get("type") not in ("LineString", "MultiLineString") or not coordinates:
+        return result
+
+    from odmcp.geo import encode_polyline, quantize, simplify_line
+
+    # each part of a MultiLineString is reduced like a LineString
+    multi = geometry["type"] == "MultiLineString"
+    parts = [
+        quantize(
+            simplify_line(part, params.geometry_tolerance),
+            params.coordinate_precision,
+        )
+        for part in (coordinates if multi else [coordinates])
+    ]
+    if params.geometry == "polyline":
+        encoded = [encode_polyline(part, params.coordinate_precision) for part in parts]
+        geometry = {
+            "type": geometry["type"],
+            "encoded": encoded if multi else encoded[0],
+        }
+    else:
+        geometry = {
+            "type": geometry["type"],
+            "coordinates": parts if multi else parts[0],
+        }
+    return {**result, "tst": {**feature, "geometry": geometry}}
+
+
+async def fetch_railway_lines(params: RailwayLineParams) -> RailwayLineResponse:
     """
     Fetch railway line information based on the provided parameters.
 
@@ -260,9 +525,14 @@ def fetch_railway_lines(params: RailwayLineParams) -> RailwayLineResponse:
         RailwayLineResponse object containing the results
     """
     endpoint = f"{BASE_URL}/catalog/datasets/linie/records"
-    response = httpx.get(endpoint, params=params.model_dump(exclude_none=True))
-    response.raise_for_status()
-    return RailwayLineResponse(**response.json())
+    data = await _query_snapshot("linie", params)
+    if data is None:
+        data = await _fetch_records("railway-lines", endpoint, params)
+    if params.geometry != "full":
+        # reduce the raw records before validation, the cached data is left intact
+        results = [_reduce_line_geometry(result, params) for result in data["results"]]
+        data = {**data, "results": results}
+    return RailwayLineResponse(**data)
 
 
 # 3. register the function to run when the tool is called
@@ -270,8 +540,9 @@ async def handle_railway_lines(
     arguments: dict[str, Any] | None = None,
 ) -> Sequence[types.TextContent | types.ImageContent | types.EmbeddedResource]:
     try:
-        railway_lines_response = fetch_railway_lines(RailwayLineParams(**arguments))
-        return [types.TextContent(type="text", text=str(railway_lines_response))]
+        params = RailwayLineParams(**(arguments or {}))
+        railway_lines_response = await fetch_railway_lines(params)
+        return _to_text_content(railway_lines_response, params)
     except Exception as e:
         log.error(f"Error fetching railway lines: {e}")
         raise
@@ -282,10 +553,37 @@ TOOLS.append(
     types.Tool(
         name="railway-lines",
         description="Fetch railway line information",
-        inputSchema=RailwayLineParams.model_json_schema(),
+        inputSchema=model_json_schema(RailwayLineParams),
     )
 )
 TOOLS_HANDLERS["railway-lines"] = handle_railway_lines
+TOOLS_TIMEOUTS["railway-lines"] = 60  # paginated calls may fetch many pages
+
+
+# 5. register the resource of each line, by line number
+async def handle_railway_line_resource(linie: str) -> str:
+    try:
+        params = RailwayLineParams(
+            where=f"linie = {int(linie)}",
+            order_by="km_anfang ASC",
+            max_records=1000,
+            geometry="polyline",
+        )
+        return format_response(await fetch_railway_lines(params))
+    except Exception as e:
+        log.error(f"Error reading railway line {linie}: {e}")
+        raise
+
+
+RESOURCE_TEMPLATES.append(
+    types.ResourceTemplate(
+        uriTemplate="sbb://linie/{linie}",
+        name="Railway line",
+        description="Sections of a railway line by line number, e.g. sbb://linie/100, with polyline geometries",
+        mimeType="application/json",
+    )
+)
+RESOURCES_HANDLERS["sbb://linie/{linie}"] = handle_railway_line_resource
 
 ###################
 # Rolling Stock Information
@@ -293,7 +591,7 @@ TOOLS_HANDLERS["railway-lines"] = handle_railway_lines
 
 
 # 1. define models for the input / output
-class RollingStockParams(BaseModel):
+class RollingStockParams(DeferredModel):
     select: Optional[str] = Field(
         None,
         description="Fields to select in the response. Examples: 'fahrzeug_typ,objekt' for basic info, 'vmax_betrieblich_zugelassen,lange_uber_puffer_lup' for technical details",
@@ -321,9 +619,19 @@ class RollingStockParams(BaseModel):
         ge=0,
         description="Number of rolling stock entries to skip for pagination",
     )
+    max_records: Optional[int] = Field(
+        None,
+        ge=1,
+        le=MAX_OFFSET,
+        description="Fetch up to this many rolling stock entries in one call by paging through the API (overrides limit, starts at offset)",
+    )
+    output_format: OutputFormat = Field(
+        default="json",
+        description="Output format: 'json' (compact), or 'csv' / 'tsv' for a table of the results",
+    )
 
 
-class RollingStockResult(BaseModel):
+class RollingStockResult(DeferredModel):
     fahrzeug_art_struktur: Optional[str] = Field(
         default=None, description="Vehicle structure type"
     )
@@ -340,13 +648,17 @@ class RollingStockResult(BaseModel):
     # Add other fields as needed, all as Optional since many can be null
 
 
-class RollingStockResponse(BaseModel):
+class RollingStockResponse(DeferredModel):
     total_count: int = Field(description="Total number of results available")
     results: List[RollingStockResult] = Field(description="List of rolling stock items")
+    stale: Optional[bool] = Field(
+        default=None,
+        description="True if served from an expired cache entry being refreshed",
+    )
 
 
 # 2. define the function to fetch the data
-def fetch_rolling_stock(params: RollingStockParams) -> RollingStockResponse:
+async def fetch_rolling_stock(params: RollingStockParams) -> RollingStockResponse:
     """
     Fetch rolling stock information based on the provided parameters.
 
@@ -357,9 +669,10 @@ def fetch_rolling_stock(params: RollingStockParams) -> RollingStockResponse:
         RollingStockResponse object containing the results
     """
     endpoint = f"{BASE_URL}/catalog/datasets/rollmaterial/records"
-    response = httpx.get(endpoint, params=params.model_dump(exclude_none=True))
-    response.raise_for_status()
-    return RollingStockResponse(**response.json())
+    data = await _query_snapshot("rollmaterial", params)
+    if data is None:
+        data = await _fetch_records("rolling-stock", endpoint, params)
+    return RollingStockResponse(**data)
 
 
 # 3. register the function to run when the tool is called
@@ -367,8 +680,9 @@ async def handle_rolling_stock(
     arguments: dict[str, Any] | None = None,
 ) -> Sequence[types.TextContent | types.ImageContent | types.EmbeddedResource]:
     try:
-        rolling_stock_response = fetch_rolling_stock(RollingStockParams(**arguments))
-        return [types.TextContent(type="text", text=str(rolling_stock_response))]
+        params = RollingStockParams(**(arguments or {}))
+        rolling_stock_response = await fetch_rolling_stock(params)
+        return _to_text_content(rolling_stock_response, params)
     except Exception as e:
         log.error(f"Error fetching rolling stock info: {e}")
         raise
@@ -379,10 +693,972 @@ TOOLS.append(
     types.Tool(
         name="rolling-stock",
         description="Fetch rolling stock (vehicle) information",
-        inputSchema=RollingStockParams.model_json_schema(),
+        inputSchema=model_json_schema(RollingStockParams),
     )
 )
 TOOLS_HANDLERS["rolling-stock"] = handle_rolling_stock
+TOOLS_TIMEOUTS["rolling-stock"] = 60  # paginated calls may fetch many pages
+
+###################
+# Bulk Exports
+###################
+
+# Whole datasets are pulled through the Explore API `exports` endpoint, which has no
+# offset ceiling and returns everything in one streamed response.
+
+
+class DatasetExportParams(DeferredModel):
+    select: Optional[str] = Field(
+        None, description="Fields to include in the export. Example: 'linie,tst'"
+    )
+    where: Optional[str] = Field(
+        None, description="Filter conditions. Example: 'linie = 100'"
+    )
+    order_by: Optional[str] = Field(
+        None, description="Sort order of the exported records. Example: 'linie ASC'"
+    )
+    limit: int = Field(
+        default=-1, ge=-1, description="Maximum number of records, -1 for all"
+    )
+    lang: Optional[str] = Field(None, description="Language code (de, fr, it, en)")
+    timezone: str = Field(default="UTC", description="Timezone for datetime fields")
+
+
+async def iter_dataset_records(
+    dataset: str, params: DatasetExportParams | None = None
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Stream all records of a dataset from its JSON Lines export.
+
+    Records are parsed one line at a time as the body arrives, so peak memory does not
+    grow with the dataset size.
+
+    Args:
+        dataset: The dataset identifier, e.g. 'linie' or 'rollmaterial'.
+        params: DatasetExportParams object containing the export query parameters
+
+    Yields:
+        The raw record dictionaries, in export order.
+    """
+    params = params or DatasetExportParams()
+    endpoint = f"{BASE_URL}/catalog/datasets/{dataset}/exports/jsonl"
+    async for record in iter_json_lines(
+        endpoint, params=params.model_dump(exclude_none=True), provider=PROVIDER
+    ):
+        yield record
+
+
+async def download_dataset(
+    dataset: str,
+    path: str | Path,
+    format: Literal["jsonl", "csv", "parquet", "geojson"] = "parquet",
+    params: DatasetExportParams | None = None,
+) -> int:
+    """
+    Download a dataset export to a file, streaming the body to disk in chunks.
+
+    Args:
+        dataset: The dataset identifier, e.g. 'linie' or 'rollmaterial'.
+        path: The destination file, overwritten if it exists.
+        format: The export format.
+        params: DatasetExportParams object containing the export query parameters
+
+    Returns:
+        The number of bytes written.
+    """
+    params = params or DatasetExportParams()
+    endpoint = f"{BASE_URL}/catalog/datasets/{dataset}/exports/{format}"
+    written = 0
+    async with stream_response(
+        endpoint, params=params.model_dump(exclude_none=True), provider=PROVIDER
+    ) as response:
+        async with await anyio.open_file(path, "wb") as f:
+            async for chunk in response.aiter_bytes():
+                written += await f.write(chunk)
+    return written
+
+
+###################
+# Local Dataset Snapshots
+###################
+
+# Datasets kept in memory and queried locally, with the ODSQL subset supported by
+# `odmcp.odsql`, mapped to the tool selecting their time-to-live. Queries outside
+# that subset are sent upstream. Enabled with ODMCP_LOCAL_DATASETS, a comma
+# separated list of dataset names, e.g. 'rollmaterial'.
+SNAPSHOT_TOOLS: dict[str, str] = {
+    "linie": "railway-lines",
+    "rollmaterial": "rolling-stock",
+    "rail-traffic-information": "rail-traffic-info",
+}
+
+# Tool parameters a snapshot cannot honor, queries using them are sent upstream.
+# The `timezone` parameter is only honored for its default, UTC.
+UPSTREAM_ONLY_PARAMS = (
+    "refine",
+    "exclude",
+    "lang",
+    "include_links",
+    "include_app_metas",
+)
+
+# Snapshots with an updater are updated incrementally, and only reloaded in full
+# every SNAPSHOT_RECONCILE_INTERVAL seconds to pick up edited and removed records.
+# Once loaded, they are updated every SNAPSHOT_SYNC_INTERVAL seconds.
+SNAPSHOT_RECONCILE_INTERVAL = 60 * 60
+SNAPSHOT_SYNC_INTERVAL = 60
+
+
+@dataclass
+class DatasetSnapshot:
+    """Records of a dataset kept in memory."""
+
+    records: list[dict[str, Any]]
+    updated_at: float  # time.monotonic() of the last full or incremental update
+    reconciled_at: float  # time.monotonic() of the last full reload
+
+
+SNAPSHOTS: dict[str, DatasetSnapshot] = {}
+_SNAPSHOT_FLIGHTS = SingleFlight()
+
+
+def local_datasets() -> list[str]:
+    """Return the datasets queried locally, selected by `ODMCP_LOCAL_DATASETS`."""
+    names = [name.strip() for name in os.getenv("ODMCP_LOCAL_DATASETS", "").split(",")]
+    return [name for name in names if name in SNAPSHOT_TOOLS]
+
+
+def _as_records_result(record: dict[str, Any]) -> dict[str, Any]:
+    """Give an exported record the shape of a records endpoint result."""
+    shape = record.get("tst")
+    if isinstance(shape, dict) and "geometry" not in shape:
+        # exports may give the bare geometry of geo_shape fields
+        shape = {"type": "Feature", "geometry": shape, "properties": {}}
+        return {**record, "tst": shape}
+    return record
+
+
+async def load_dataset_snapshot(dataset: str) -> list[dict[str, Any]]:
+    """
+    Download all records of a dataset from its JSON Lines export.
+
+    Args:
+        dataset: The dataset identifier, e.g. 'rollmaterial'.
+
+    Returns:
+        The records, shaped like the records endpoint results.
+    """
+    records = [_as_records_result(r) async for r in iter_dataset_records(dataset)]
+    log.info(f"Loaded snapshot of {dataset} with {len(records)} records")
+    return records
+
+
+def _traffic_info_key(record: dict[str, Any]) -> str:
+    """Identify a traffic message, by its link when it has one."""
+    return record.get("link") or f"{record.get('title')}@{record.get('published')}"
+
+
+async def fetch_rail_traffic_info_since(published: str) -> list[dict[str, Any]]:
+    """
+    Fetch the raw traffic messages published at or after a date, oldest first.
+
+    Args:
+        published: The ISO 8601 publication date, e.g. '2024-01-01T10:00:00+00:00'.
+
+    Returns:
+        The raw records, at most MAX_OFFSET of them.
+    """
+    endpoint = f"{BASE_URL}/catalog/datasets/rail-traffic-information/records"
+    records: list[dict[str, Any]] = []
+    for offset in range(0, MAX_OFFSET, PAGE_SIZE):
+        page = await fetch_json(
+            endpoint,
+            params={
+                "where": f"published >= date'{published}'",
+                "order_by": "published ASC",
+                "limit": PAGE_SIZE,
+                "offset": offset,
+            },
+            provider=PROVIDER,
+        )
+        records.extend(page["results"])
+        if len(page["results"]) < PAGE_SIZE:
+            break
+    return records
+
+
+async def sync_rail_traffic_info(
+    records: list[dict[str, Any]],
+) -> list[dict[str, Any]]:
+    """
+    Merge the traffic messages published since the newest known one.
+
+    Only the messages published after the watermark, the newest `published` date
+    of `records`, are fetched. Messages sharing the watermark date are fetched
+    again and deduplicated.
+
+    Args:
+        records: The known traffic messages.
+
+    Returns:
+        The updated traffic messages.
+    """
+    published = [record["published"] for record in records if record.get("published")]
+    if not published:
+        return await load_dataset_snapshot("rail-traffic-information")
+
+    merged = {_traffic_info_key(record): record for record in records}
+    changes = await fetch_rail_traffic_info_since(max(published))
+    for record in changes:
+        merged[_traffic_info_key(record)] = record
+    log.debug(f"Synced {len(changes)} traffic messages since {max(published)}")
+    return list(merged.values())
+
+
+# incremental updaters of the snapshots, see SNAPSHOT_RECONCILE_INTERVAL
+SNAPSHOT_UPDATERS: dict[
+    str, Callable[[list[dict[str, Any]]], Awaitable[list[dict[str, Any]]]]
+] = {
+    "rail-traffic-information": sync_rail_traffic_info,
+}
+
+
+async def _update_dataset_snapshot(dataset: str) -> list[dict[str, Any]]:
+    """Update a snapshot incrementally if possible, or reload it in full."""
+    snapshot = SNAPSHOTS.get(dataset)
+    updater = SNAPSHOT_UPDATERS.get(dataset)
+    now = time.monotonic()
+    if (
+        snapshot is not None
+        and updater is not None
+        and now - snapshot.reconciled_at < SNAPSHOT_RECONCILE_INTERVAL
+    ):
+        records = await updater(snapshot.records)
+        SNAPSHOTS[dataset] = DatasetSnapshot(records, now, snapshot.reconciled_at)
+    else:
+        records = await load_dataset_snapshot(dataset)
+        SNAPSHOTS[dataset] = DatasetSnapshot(records, now, now)
+    return records
+
+
+async def _refresh_dataset_snapshot(dataset: str) -> list[dict[str, Any]]:
+    return await _SNAPSHOT_FLIGHTS.do(
+        dataset, lambda: _update_dataset_snapshot(dataset)
+    )
+
+
+async def _refresh_dataset_snapshot_in_background(dataset: str) -> None:
+    try:
+        await _refresh_dataset_snapshot(dataset)
+    except Exception as e:
+        log.error(f"Error refreshing snapshot of {dataset}: {e}")
+
+
+async def get_dataset_snapshot(dataset: str) -> list[dict[str, Any]]:
+    """
+    Return the records of a dataset snapshot, loading it if needed.
+
+    A snapshot older than the time-to-live of its tool is refreshed in the
+    background while it keeps serving queries, or refreshed before answering when
+    the provider has no background task group.
+
+    Args:
+        dataset: The dataset identifier, one of `SNAPSHOT_TOOLS`.
+
+    Returns:
+        The snapshot records.
+    """
+    snapshot = SNAPSHOTS.get(dataset)
+    if snapshot is not None:
+        age = time.monotonic() - snapshot.updated_at
+        if age < CACHE_TTLS[SNAPSHOT_TOOLS[dataset]]:
+            return snapshot.records
+        if BACKGROUND_TASKS is not None:
+            if dataset not in _SNAPSHOT_FLIGHTS:
+                BACKGROUND_TASKS.start_soon(
+                    _refresh_dataset_snapshot_in_background, dataset
+                )
+            return snapshot.records
+    return await _refresh_dataset_snapshot(dataset)
+
+
+async def sync_local_datasets_periodically(
+    interval: float = SNAPSHOT_SYNC_INTERVAL,
+) -> None:
+    """Update the incrementally updated snapshots every `interval` seconds."""
+    while True:
+        await anyio.sleep(interval)
+        for dataset in SNAPSHOT_UPDATERS:
+            if dataset in SNAPSHOTS and dataset in local_datasets():
+                await _refresh_dataset_snapshot_in_background(dataset)
+
+
+async def load_local_datasets() -> None:
+    """Load the snapshots of the datasets enabled by `ODMCP_LOCAL_DATASETS`."""
+    async with anyio.create_task_group() as tg:
+        for dataset in local_datasets():
+            tg.start_soon(get_dataset_snapshot, dataset)
+
+
+async def _query_snapshot(dataset: str, params: BaseModel) -> dict[str, Any] | None:
+    """
+    Answer a records query from the local snapshot of a dataset.
+
+    Args:
+        dataset: The dataset identifier.
+        params: The validated tool parameters, with the ODSQL clauses, `limit`,
+            `offset` and `max_records`.
+
+    Returns:
+        The response shaped like the records endpoint, or None when the dataset is
+        not queried locally, the query is not supported locally or the snapshot
+        cannot be loaded. The query should then be sent upstream.
+    """
+    if dataset not in local_datasets():
+        return None
+    if any(getattr(params, name, None) for name in UPSTREAM_ONLY_PARAMS):
+        return None
+    if getattr(params, "timezone", "UTC") != "UTC":
+        return None
+
+    # local queries are opt-in, the ODSQL compiler is imported on first use
+    from odmcp.odsql import UnsupportedQuery, compile_query
+
+    try:
+        query = compile_query(
+            params.select, params.where, params.group_by, params.order_by
+        )
+    except UnsupportedQuery as e:
+        log.info(f"Querying {dataset} upstream: {e}")
+        return None
+
+    try:
+        records = await get_dataset_snapshot(dataset)
+    except Exception as e:
+        log.error(f"Error loading snapshot of {dataset}, querying upstream: {e}")
+        return None
+
+    max_records = getattr(params, "max_records", None)
+    limit = params.limit if max_records is None else max_records
+    try:
+        return query.run(records, limit=limit, offset=params.offset)
+    except UnsupportedQuery as e:
+        log.info(f"Querying {dataset} upstream: {e}")
+        return None
+
+
+###################
+# Railway Line Spatial Index
+###################
+
+# Nearest and bounding box queries over railway lines are answered locally from a
+# grid index built from the `linie` bulk export on first use. While the server runs,
+# a built index is rebuilt every LINE_INDEX_REFRESH_INTERVAL seconds.
+LINE_INDEX_REFRESH_INTERVAL = 24 * 60 * 60
+LINE_INDEX_FIELDS = (
+    "linie,linienname,bpk_anfang,bpk_ende,km_anfang,km_ende,tst,geo_point_2d"
+)
+
+
+# 1. define models for the input / output
+class NearestRailwayLineParams(DeferredModel):
+    lon: float = Field(
+        ge=-180, le=180, description="Longitude of the location. Example: 8.5402"
+    )
+    lat: float = Field(
+        ge=-90, le=90, description="Latitude of the location. Example: 47.3782"
+    )
+    limit: int = Field(
+        default=5, ge=1, le=50, description="Number of closest lines to return (1-50)"
+    )
+    max_distance_km: Optional[float] = Field(
+        None, gt=0, description="Ignore lines further away than this distance in km"
+    )
+    output_format: OutputFormat = Field(
+        default="json",
+        description="Output format: 'json' (compact), or 'csv' / 'tsv' for a table of the results",
+    )
+
+
+class RailwayLineBBoxParams(DeferredModel):
+    min_lon: float = Field(ge=-180, le=180, description="Western edge of the box")
+    min_lat: float = Field(ge=-90, le=90, description="Southern edge of the box")
+    max_lon: float = Field(ge=-180, le=180, description="Eastern edge of the box")
+    max_lat: float = Field(ge=-90, le=90, description="Northern edge of the box")
+    limit: int = Field(
+        default=100,
+        ge=1,
+        le=1000,
+        description="Maximum number of railway lines to return (1-1000)",
+    )
+    output_format: OutputFormat = Field(
+        default="json",
+        description="Output format: 'json' (compact), or 'csv' / 'tsv' for a table of the results",
+    )
+
+    @model_validator(mode="after")
+    def check_bounds(self) -> "RailwayLineBBoxParams":
+        if self.min_lon > self.max_lon:
+            raise ValueError("min_lon must not be greater than max_lon")
+        if self.min_lat > self.max_lat:
+            raise ValueError("min_lat must not be greater than max_lat")
+        return self
+
+
+class RailwayLineMatch(DeferredModel):
+    linie: Optional[int] = Field(default=None, description="Line number")
+    linienname: Optional[str] = Field(default=None, description="Line name/description")
+    bpk_anfang: Optional[str] = Field(default=None, description="Starting station")
+    bpk_ende: Optional[str] = Field(default=None, description="End station")
+    km_anfang: Optional[float] = Field(default=None, description="Starting kilometer")
+    km_ende: Optional[float] = Field(default=None, description="End kilometer")
+    distance_km: Optional[float] = Field(
+        default=None, description="Distance from the queried location in km"
+    )
+
+
+class RailwayLineMatchResponse(DeferredModel):
+    total_count: int = Field(description="Total number of matching lines")
+    results: List[RailwayLineMatch] = Field(description="List of matching lines")
+
+
+class RailwayLineIndex:
+    """Spatial index over the railway lines, keyed by position in `lines`."""
+
+    def __init__(self):
+        from odmcp.geo import SpatialIndex
+
+        # a 5 km grid projected around the latitude of Switzerland
+        self.index = SpatialIndex(cell_size_km=5.0, ref_lat=46.8)
+        self.lines: list[RailwayLineMatch] = []
+
+    def add(self, record: dict[str, Any]) -> None:
+        """Index a raw `linie` record, from the records or the exports endpoint."""
+        key = len(self.lines)
+        self.lines.append(RailwayLineMatch(**record))
+        for part in _line_parts(record):
+            self.index.insert(key, part)
+
+
+def _line_parts(record: dict[str, Any]) -> list["Coordinates"]:
+    """Extract the line strings of a raw `linie` record, or its center point."""
+    feature = record.get("tst") or {}
+    geometry = feature.get("geometry", feature)
+    coordinates = geometry.get("coordinates")
+    if coordinates and geometry.get("type") == "LineString":
+        return [coordinates]
+    if coordinates and geometry.get("type") == "MultiLineString":
+        return coordinates
+
+    point = record.get("geo_point_2d")
+    if point:
+        return [[[point["lon"], point["lat"]]]]
+    return []
+
+
+LINE_INDEX: RailwayLineIndex | None = None
+_LINE_INDEX_FLIGHTS = SingleFlight()
+
+
+# 2. define the function to fetch the data
+async def build_railway_line_index() -> RailwayLineIndex:
+    """
+    Build the railway line spatial index from the streamed `linie` export.
+
+    Returns:
+        The built index.
+    """
+    line_index = RailwayLineIndex()
+    params = DatasetExportParams(select=LINE_INDEX_FIELDS)
+    async for record in iter_dataset_records("linie", params):
+        line_index.add(record)
+    log.info(f"Built railway line index with {len(line_index.lines)} lines")
+    return line_index
+
+
+async def get_railway_line_index(refresh: bool = False) -> RailwayLineIndex:
+    """
+    Return the railway line spatial index, building it if needed.
+
+    Concurrent callers share a single build. The previous index keeps serving
+    queries until a refreshed one replaces it.
+
+    Args:
+        refresh: Rebuild the index even if one is already built.
+
+    Returns:
+        The current index.
+    """
+    global LINE_INDEX
+    if LINE_INDEX is None or refresh:
+        LINE_INDEX = await _LINE_INDEX_FLIGHTS.do("linie", build_railway_line_index)
+    return LINE_INDEX
+
+
+async def refresh_railway_line_index_periodically(
+    interval: float = LINE_INDEX_REFRESH_INTERVAL,
+) -> None:
+    """Rebuild the railway line index every `interval` seconds, once it is used."""
+    while True:
+        await anyio.sleep(interval)
+        if LINE_INDEX is None:
+            continue
+        try:
+            await get_railway_line_index(refresh=True)
+        except Exception as e:
+            log.error(f"Error refreshing railway line index: {e}")
+
+
+async def find_nearest_railway_lines(
+    params: NearestRailwayLineParams,
+) -> RailwayLineMatchResponse:
+    """
+    Find the railway lines closest to a location, using the local spatial index.
+
+    Args:
+        params: NearestRailwayLineParams object containing all query parameters
+
+    Returns:
+        RailwayLineMatchResponse object containing the closest lines first
+    """
+    line_index = await get_railway_line_index()
+    nearest = line_index.index.nearest(
+        params.lon, params.lat, params.limit, params.max_distance_km
+    )
+    results = [
+        line_index.lines[key].model_copy(update={"distance_km": round(distance, 3)})
+        for distance, key in nearest
+    ]
+    return RailwayLineMatchResponse(total_count=len(results), results=results)
+
+
+async def find_railway_lines_in_bbox(
+    params: RailwayLineBBoxParams,
+) -> RailwayLineMatchResponse:
+    """
+    Find the railway lines crossing a bounding box, using the local spatial index.
+
+    Args:
+        params: RailwayLineBBoxParams object containing all query parameters
+
+    Returns:
+        RailwayLineMatchResponse object containing the matching lines
+    """
+    line_index = await get_railway_line_index()
+    keys = line_index.index.within_bbox(
+        params.min_lon, params.min_lat, params.max_lon, params.max_lat
+    )
+    results = [line_index.lines[key] for key in keys[: params.limit]]
+    return RailwayLineMatchResponse(total_count=len(keys), results=results)
+
+
+# 3. register the function to run when the tool is called
+async def handle_nearest_railway_lines(
+    arguments: dict[str, Any] | None = None,
+) -> Sequence[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+    try:
+        params = NearestRailwayLineParams(**(arguments or {}))
+        nearest_lines_response = await find_nearest_railway_lines(params)
+        return _to_text_content(nearest_lines_response, params)
+    except Exception as e:
+        log.error(f"Error finding nearest railway lines: {e}")
+        raise
+
+
+async def handle_railway_lines_in_bbox(
+    arguments: dict[str, Any] | None = None,
+) -> Sequence[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+    try:
+        params = RailwayLineBBoxParams(**(arguments or {}))
+        bbox_lines_response = await find_railway_lines_in_bbox(params)
+        return _to_text_content(bbox_lines_response, params)
+    except Exception as e:
+        log.error(f"Error finding railway lines in bounding box: {e}")
+        raise
+
+
+# 4. register the tools
+TOOLS.append(
+    types.Tool(
+        name="railway-lines-nearest",
+        description="Find the railway lines closest to a location (lon/lat)",
+        inputSchema=model_json_schema(NearestRailwayLineParams),
+    )
+)
+TOOLS_HANDLERS["railway-lines-nearest"] = handle_nearest_railway_lines
+TOOLS_TIMEOUTS["railway-lines-nearest"] = 120  # the first call builds the index
+
+TOOLS.append(
+    types.Tool(
+        name="railway-lines-bbox",
+        description="Find the railway lines crossing a bounding box (lon/lat)",
+        inputSchema=model_json_schema(RailwayLineBBoxParams),
+    )
+)
+TOOLS_HANDLERS["railway-lines-bbox"] = handle_railway_lines_in_bbox
+TOOLS_TIMEOUTS["railway-lines-bbox"] = 120  # the first call builds the index
+
+###################
+# Aggregations
+###################
+
+# Counts, sums or averages are computed by the Explore API (or the local snapshot)
+# with `group_by` and aggregate expressions, so that only the grouped table is
+# transferred instead of every matching record.
+
+
+# 1. define models for the input / output
+class AggregateParams(DeferredModel):
+    aggregates: str = Field(
+        default="count(*) as count",
+        description="Aggregate expressions: count, sum, avg, min or max of a field, comma separated. Examples: 'count(*) as n', 'avg(vmax_betrieblich_zugelassen) as mean_vmax, max(eigengewicht_tara)'",
+    )
+    group_by: Optional[str] = Field(
+        None,
+        description="Fields to group by, comma separated. Examples: 'fahrzeug_typ', 'author'",
+    )
+    where: Optional[str] = Field(
+        None,
+        description="Filter conditions applied before grouping. Example: 'vmax_betrieblich_zugelassen >= 160'",
+    )
+    order_by: Optional[str] = Field(
+        None,
+        description="Sort the groups by a grouped field or an aggregate alias. Example: 'n DESC'",
+    )
+    limit: int = Field(
+        default=100, ge=1, le=100, description="Maximum number of groups (1-100)"
+    )
+    offset: int = Field(default=0, ge=0, description="Number of groups to skip")
+    output_format: OutputFormat = Field(
+        default="csv",
+        description="Output format: 'csv' / 'tsv' for a table of the groups, or 'json'",
+    )
+
+    @computed_field
+    @property
+    def select(self) -> str:
+        """The ODSQL select clause: the grouped fields then the aggregates."""
+        return ", ".join(filter(None, [self.group_by, self.aggregates]))
+
+
+class AggregateResponse(DeferredModel):
+    total_count: Optional[int] = Field(
+        default=None, description="Total number of groups available"
+    )
+    results: List[dict[str, Any]] = Field(
+        description="One row per group, with the grouped fields and the aggregates"
+    )
+    stale: Optional[bool] = Field(
+        default=None,
+        description="True if served from an expired cache entry being refreshed",
+    )
+
+
+# aggregation tools, with the records tool and the dataset they aggregate
+AGGREGATE_TOOLS: dict[str, tuple[str, str]] = {
+    "rail-traffic-info-aggregate": ("rail-traffic-info", "rail-traffic-information"),
+    "railway-lines-aggregate": ("railway-lines", "linie"),
+    "rolling-stock-aggregate": ("rolling-stock", "rollmaterial"),
+}
+
+
+# 2. define the function to fetch the data
+async def fetch_aggregates(tool: str, params: AggregateParams) -> AggregateResponse:
+    """
+    Aggregate the records of a dataset, locally when a snapshot is kept.
+
+    Args:
+        tool: The aggregation tool name, one of `AGGREGATE_TOOLS`.
+        params: AggregateParams object containing all query parameters
+
+    Returns:
+        AggregateResponse object containing one row per group
+    """
+    records_tool, dataset = AGGREGATE_TOOLS[tool]
+    data = await _query_snapshot(dataset, params)
+    if data is None:
+        endpoint = f"{BASE_URL}/catalog/datasets/{dataset}/records"
+        data = await _fetch_cached(records_tool, endpoint, params)
+    return AggregateResponse(**data)
+
+
+# 3. register the function to run when the tool is called
+def _aggregate_handler(
+    tool: str,
+) -> Callable[..., Awaitable[Sequence[types.TextContent]]]:
+    async def handle_aggregate(
+        arguments: dict[str, Any] | None = None,
+    ) -> Sequence[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+        try:
+            params = AggregateParams(**(arguments or {}))
+            aggregate_response = await fetch_aggregates(tool, params)
+            return _to_text_content(aggregate_response, params)
+        except Exception as e:
+            log.error(f"Error aggregating {tool}: {e}")
+            raise
+
+    return handle_aggregate
+
+
+# 4. register the tools
+for _tool, (_records_tool, _dataset) in AGGREGATE_TOOLS.items():
+    TOOLS.append(
+        types.Tool(
+            name=_tool,
+            description=f"Count, sum or average the '{_dataset}' records (as returned by {_records_tool}) per group, returning only the grouped table",
+            inputSchema=model_json_schema(AggregateParams),
+        )
+    )
+    TOOLS_HANDLERS[_tool] = _aggregate_handler(_tool)
+    TOOLS_TIMEOUTS[_tool] = 30
+
+###################
+# Facets
+###################
+
+# The distinct values of the dataset fields, with their record counts, help build
+# `refine` and `where` clauses without pulling records first. Facets change slowly
+# and are cached with a long time-to-live.
+
+
+# 1. define models for the input / output
+class FacetParams(DeferredModel):
+    facet: Optional[List[str]] = Field(
+        None,
+        description="Fields to list the values of. Examples: ['author'], ['fahrzeug_typ', 'fahrzeug_art_struktur']. The dataset default facets if omitted",
+    )
+    where: Optional[str] = Field(
+        None,
+        description="Only count the records matching these conditions. Example: 'vmax_betrieblich_zugelassen >= 160'",
+    )
+    max_values: int = Field(
+        default=50,
+        ge=1,
+        le=1000,
+        description="Maximum number of values returned per facet, most frequent first",
+    )
+    output_format: OutputFormat = Field(
+        default="json",
+        description="Output format: 'json' (compact), or 'csv' / 'tsv' for a table of the values",
+    )
+
+
+class FacetValue(DeferredModel):
+    facet: str = Field(description="Field name")
+    value: str = Field(description="Field value, usable in refine or where clauses")
+    count: int = Field(description="Number of records with this value")
+
+
+class FacetResponse(DeferredModel):
+    results: List[FacetValue] = Field(description="Values of each facet")
+    stale: Optional[bool] = Field(
+        default=None,
+        description="True if served from an expired cache entry being refreshed",
+    )
+
+
+# facet tools, with the dataset they describe
+FACET_TOOLS: dict[str, str] = {
+    "rail-traffic-info-facets": "rail-traffic-information",
+    "railway-lines-facets": "linie",
+    "rolling-stock-facets": "rollmaterial",
+}
+
+
+# 2. define the function to fetch the data
+async def fetch_facets(tool: str, params: FacetParams) -> FacetResponse:
+    """
+    Fetch the values of the facets of a dataset, with their record counts.
+
+    Args:
+        tool: The facets tool name, one of `FACET_TOOLS`.
+        params: FacetParams object containing all query parameters
+
+    Returns:
+        FacetResponse object containing the values of each facet
+    """
+    endpoint = f"{BASE_URL}/catalog/datasets/{FACET_TOOLS[tool]}/facets"
+    data = await _fetch_cached(tool, endpoint, params)
+
+    results = []
+    for facet in data.get("facets", []):
+        values = sorted(facet.get("facets", []), key=lambda v: -v.get("count", 0))
+        results.extend(
+            {
+                "facet": facet["name"],
+                "value": str(value["value"]),
+                "count": value["count"],
+            }
+            for value in values[: params.max_values]
+        )
+    return FacetResponse(results=results, stale=data.get("stale"))
+
+
+# 3. register the function to run when the tool is called
+def _facets_handler(tool: str) -> Callable[..., Awaitable[Sequence[types.TextContent]]]:
+    async def handle_facets(
+        arguments: dict[str, Any] | None = None,
+    ) -> Sequence[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+        try:
+            params = FacetParams(**(arguments or {}))
+            facet_response = await fetch_facets(tool, params)
+            return _to_text_content(facet_response, params)
+        except Exception as e:
+            log.error(f"Error fetching facets of {tool}: {e}")
+            raise
+
+    return handle_facets
+
+
+# 4. register the tools
+for _tool, _dataset in FACET_TOOLS.items():
+    TOOLS.append(
+        types.Tool(
+            name=_tool,
+            description=f"List the distinct values of the '{_dataset}' fields with their record counts, to build refine or where clauses",
+            inputSchema=model_json_schema(FacetParams),
+        )
+    )
+    TOOLS_HANDLERS[_tool] = _facets_handler(_tool)
+    TOOLS_TIMEOUTS[_tool] = 30
+
+###################
+# Active Disruptions
+###################
+
+# The disruptions currently in effect are exposed as a resource clients subscribe
+# to. A single poller refreshes them for all clients every
+# ACTIVE_DISRUPTIONS_POLL_INTERVAL seconds, while anyone is subscribed, and the
+# subscribers are sent `notifications/resources/updated` when they change.
+# Disruptions are active once they began and until they end, planned works that
+# have not started are left out. A disruption without an end stays active.
+ACTIVE_DISRUPTIONS_URI = "sbb://rail-traffic-info/disruptions/active"
+ACTIVE_DISRUPTIONS_POLL_INTERVAL = 60
+# the parameters model is validated on first use, to keep its build deferred
+ACTIVE_DISRUPTIONS_PARAMS = dict(
+    where="validitybegin <= now() AND (validityend >= now() OR validityend IS NULL)",
+    order_by="validitybegin ASC",
+    max_records=1000,
+)
+
+
+# 1. define models for the input / output
+@dataclass
+class ActiveDisruptions:
+    """Last polled state of the active disruptions."""
+
+    response: TrafficInfoResponse
+    updated_at: float  # time.monotonic() of the last poll
+
+
+ACTIVE_DISRUPTIONS: ActiveDisruptions | None = None
+_ACTIVE_DISRUPTIONS_FLIGHTS = SingleFlight()
+
+
+# 2. define the function to fetch the data
+def diff_disruptions(
+    previous: TrafficInfoResponse, current: TrafficInfoResponse
+) -> tuple[list[str], list[str], list[str]]:
+    """
+    Compare two states of the active disruptions.
+
+    Args:
+        previous: The previously polled disruptions.
+        current: The newly polled disruptions.
+
+    Returns:
+        The keys of the added, removed and changed disruptions.
+    """
+    before = {
+        _traffic_info_key(r): r
+        for r in (result.model_dump() for result in previous.results)
+    }
+    after = {
+        _traffic_info_key(r): r
+        for r in (result.model_dump() for result in current.results)
+    }
+    added = [key for key in after if key not in before]
+    removed = [key for key in before if key not in after]
+    changed = [key for key in after if key in before and after[key] != before[key]]
+    return added, removed, changed
+
+
+async def refresh_active_disruptions() -> ActiveDisruptions:
+    """
+    Poll the active disruptions and notify the subscribers if they changed.
+
+    Concurrent refreshes share a single upstream request.
+
+    Returns:
+        The new state of the active disruptions.
+    """
+
+    async def refresh() -> ActiveDisruptions:
+        global ACTIVE_DISRUPTIONS
+        response = await fetch_rail_traffic_info(
+            TrafficInfoParams(**ACTIVE_DISRUPTIONS_PARAMS)
+        )
+        previous = ACTIVE_DISRUPTIONS
+        ACTIVE_DISRUPTIONS = ActiveDisruptions(response, time.monotonic())
+        if previous is None:
+            return ACTIVE_DISRUPTIONS
+
+        added, removed, changed = diff_disruptions(previous.response, response)
+        if added or removed or changed:
+            log.info(
+                f"Active disruptions changed: {len(added)} added, "
+                f"{len(removed)} removed, {len(changed)} updated"
+            )
+            await SUBSCRIPTIONS.notify(ACTIVE_DISRUPTIONS_URI)
+        return ACTIVE_DISRUPTIONS
+
+    return await _ACTIVE_DISRUPTIONS_FLIGHTS.do(ACTIVE_DISRUPTIONS_URI, refresh)
+
+
+async def get_active_disruptions() -> TrafficInfoResponse:
+    """Return the active disruptions, polled again if the last poll is too old."""
+    disruptions = ACTIVE_DISRUPTIONS
+    if (
+        disruptions is None
+        or time.monotonic() - disruptions.updated_at >= ACTIVE_DISRUPTIONS_POLL_INTERVAL
+    ):
+        disruptions = await refresh_active_disruptions()
+    return disruptions.response
+
+
+async def poll_active_disruptions_periodically(
+    interval: float = ACTIVE_DISRUPTIONS_POLL_INTERVAL,
+) -> None:
+    """Poll the active disruptions every `interval` seconds, while subscribed to."""
+    while True:
+        await anyio.sleep(interval)
+        if not SUBSCRIPTIONS.subscribers(ACTIVE_DISRUPTIONS_URI):
+            continue
+        try:
+            await refresh_active_disruptions()
+        except Exception as e:
+            log.error(f"Error polling active disruptions: {e}")
+
+
+# 3. register the function to run when the resource is read
+async def handle_active_disruptions() -> str:
+    try:
+        return format_response(await get_active_disruptions())
+    except Exception as e:
+        log.error(f"Error reading active disruptions: {e}")
+        raise
+
+
+# 4. register the resource
+RESOURCES.append(
+    types.Resource(
+        uri=AnyUrl(ACTIVE_DISRUPTIONS_URI),
+        name="Active rail disruptions",
+        description="Rail traffic disruptions currently in effect, updated every minute. Subscribe to be notified when they change",
+        mimeType="application/json",
+    )
+)
+RESOURCES_HANDLERS[ACTIVE_DISRUPTIONS_URI] = handle_active_disruptions
 
 ###################
 # Other Endpoint Name
@@ -390,32 +1666,135 @@ TOOLS_HANDLERS["rolling-stock"] = handle_rolling_stock
 ...
 
 
+###################
+# Warm-up
+###################
+
+# Requests prefetched in the background when the server starts, so that the first
+# tool calls are served from the cache. `ODMCP_WARMUP` selects them: unset for the
+# cheap WARMUP_DEFAULT tasks, 'all', a comma separated list of names, or '0' to
+# disable the warm-up.
+WARMUP_TASKS: dict[str, Callable[[], Awaitable[Any]]] = {
+    "rail-traffic-info": lambda: fetch_rail_traffic_info(TrafficInfoParams()),
+    "railway-lines": lambda: fetch_railway_lines(RailwayLineParams()),
+    "rolling-stock": lambda: fetch_rolling_stock(RollingStockParams()),
+    "railway-line-index": get_railway_line_index,  # downloads the whole dataset
+    "local-datasets": load_local_datasets,  # see ODMCP_LOCAL_DATASETS
+}
+# Every client session may start a server process, most never use the spatial
+# tools: the railway line index, with the whole `linie` export, is opt-in.
+WARMUP_DEFAULT = (
+    "rail-traffic-info",
+    "railway-lines",
+    "rolling-stock",
+    "local-datasets",
+)
+
+
+def warmup_names() -> list[str]:
+    """Return the names of the warm-up tasks selected by `ODMCP_WARMUP`."""
+    value = os.getenv("ODMCP_WARMUP")
+    if value is None or value.strip() in ("", "1"):
+        return list(WARMUP_DEFAULT)
+    if value.strip().lower() == "all":
+        return list(WARMUP_TASKS)
+    if value.strip().lower() in ("0", "none"):
+        return []
+
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    for name in names:
+        if name not in WARMUP_TASKS:
+            log.warning(f"Unknown warm-up task {name}")
+    return [name for name in names if name in WARMUP_TASKS]
+
+
+async def warm_up(names: Sequence[str] | None = None) -> None:
+    """
+    Run warm-up tasks concurrently, logging rather than raising their errors.
+
+    Args:
+        names: The warm-up tasks to run, all of `WARMUP_TASKS` if None.
+    """
+
+    async def run(name: str) -> None:
+        try:
+            await WARMUP_TASKS[name]()
+            log.info(f"Warm-up of {name} done")
+        except Exception as e:
+            log.warning(f"Error warming up {name}: {e}")
+
+    async with anyio.create_task_group() as tg:
+        for name in WARMUP_TASKS if names is None else names:
+            tg.start_soon(run, name)
+
+
+@asynccontextmanager
+async def lifespan() -> AsyncIterator[None]:
+    """
+    Open the provider resources (HTTP pool, background tasks) while serving.
+
+    The warm-up runs in the background, so the transport starts without waiting.
+    """
+    global BACKGROUND_TASKS
+    async with http_client(PROVIDER), anyio.create_task_group() as tg:
+        BACKGROUND_TASKS = tg
+        tg.start_soon(refresh_railway_line_index_periodically)
+        tg.start_soon(sync_local_datasets_periodically)
+        tg.start_soon(poll_active_disruptions_periodically)
+        tg.start_soon(warm_up, warmup_names())
+        try:
+            yield
+        finally:
+            BACKGROUND_TASKS = None
+            tg.cancel_scope.cancel()
+
+
 async def main():
+    from mcp.server import stdio_server
+
     from odmcp.utils import create_mcp_server
 
     # create the server
     server = create_mcp_server(
-        "data.sbb.ch", RESOURCES, RESOURCES_HANDLERS, TOOLS, TOOLS_HANDLERS
+        "data.sbb.ch",
+        RESOURCES,
+        RESOURCES_HANDLERS,
+        TOOLS,
+        TOOLS_HANDLERS,
+        tools_timeouts=TOOLS_TIMEOUTS,
+        resource_templates=RESOURCE_TEMPLATES,
     )
 
-    # run the server
-    async with stdio_server() as streams:
+    # run the server, reusing pooled upstream connections until it shuts down
+    async with lifespan(), stdio_server() as streams:
         await server.run(streams[0], streams[1], server.create_initialization_options())
 
 
-if __name__ == "__main__":
-    # anyio.run(main)
-
-    # test the endpoints
+async def _test_endpoints():
     print(
         "Rail Traffic Info:",
-        fetch_rail_traffic_info(TrafficInfoParams(select="title,description", limit=1)),
+        await fetch_rail_traffic_info(
+            TrafficInfoParams(select="title,description", limit=1)
+        ),
     )
     print(
         "Railway Lines:",
-        fetch_railway_lines(RailwayLineParams(select="linie,linienname", limit=1)),
+        await fetch_railway_lines(
+            RailwayLineParams(select="linie,linienname", limit=1)
+        ),
     )
     print(
         "Rolling Stock:",
-        fetch_rolling_stock(RollingStockParams(select="fahrzeug_typ,objekt", limit=1)),
+        await fetch_rolling_stock(
+            RollingStockParams(select="fahrzeug_typ,objekt", limit=1)
+        ),
     )
+
+
+if __name__ == "__main__":
+    import anyio
+
+    # anyio.run(main)
+
+    # test the endpoints
+    anyio.run(_test_endpoints)
@@ -0,0 +1,148 @@
+"""
+Upstream rate limiting for provider modules.
+
+An `UpstreamLimiter` combines a token bucket (sustained request rate with bursts)
+with a cap on the number of requests in flight. Callers over the limit are queued
+rather than failed, which keeps the load on the upstream API predictable and avoids
+the retry storms that follow HTTP 429 responses. Wait times are recorded so that
+queueing can be monitored.
+"""
+
+import logging
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, Callable, ClassVar
+
+import anyio
+from pydantic import Field
+
+from odmcp.config import EnvConfig
+
+log = logging.getLogger(__name__)
+
+
+class RateLimitConfig(EnvConfig):
+    """Limits applied to the requests sent to an upstream API."""
+
+    env_prefix: ClassVar[str] = "ODMCP_UPSTREAM_"
+
+    requests_per_second: float | None = Field(
+        default=10.0, gt=0, description="Sustained request rate, unlimited if None"
+    )
+    burst: int = Field(
+        default=20, ge=1, description="Requests allowed at once above the rate"
+    )
+    max_in_flight: int | None = Field(
+        default=8, ge=1, description="Maximum concurrent requests, unlimited if None"
+    )
+
+
+class TokenBucket:
+    """
+    Token bucket queueing callers in arrival order.
+
+    Each `acquire` takes a token, possibly driving the balance negative: the caller
+    then sleeps until the bucket has refilled up to its reservation.
+
+    Args:
+        rate: Tokens added per second.
+        burst: Capacity of the bucket.
+        clock: Monotonic clock.
+    """
+
+    def __init__(
+        self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+
+    async def acquire(self) -> None:
+        """Take a token, waiting for the bucket to refill if it is empty."""
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return
+
+        try:
+            await anyio.sleep(-self._tokens / self.rate)
+        except BaseException:
+            self._tokens += 1  # give the reservation back when cancelled
+            raise
+
+
+class UpstreamLimiter:
+    """
+    Rate and concurrency limiter for the requests sent to an upstream API.
+
+    Args:
+        config: The limits, unlimited where None.
+        clock: Monotonic clock, also used to measure wait times.
+    """
+
+    def __init__(
+        self,
+        config: RateLimitConfig | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.config = config or RateLimitConfig()
+        self.clock = clock
+        self._bucket = (
+            TokenBucket(self.config.requests_per_second, self.config.burst, clock)
+            if self.config.requests_per_second
+            else None
+        )
+        self._in_flight = (
+            anyio.Semaphore(self.config.max_in_flight)
+            if self.config.max_in_flight
+            else None
+        )
+        self.requests = 0
+        self.waiting = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[None]:
+        """Wait for a request slot, held until the context exits."""
+        start = self.clock()
+        self.waiting += 1
+        queued = True
+        try:
+            async with AsyncExitStack() as stack:
+                if self._in_flight is not None:
+                    await stack.enter_async_context(self._in_flight)
+                if self._bucket is not None:
+                    await self._bucket.acquire()
+
+                self.waiting -= 1
+                queued = False
+                wait = self.clock() - start
+                self.requests += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+                if wait > 1:
+                    log.info(f"Upstream request queued for {wait:.2f}s")
+                yield
+        finally:
+            if queued:  # cancelled while waiting
+                self.waiting -= 1
+
+    def stats(self) -> dict[str, float]:
+        """Return the request count, queue length and wait times in seconds."""
+        return {
+            "requests": self.requests,
+            "waiting": self.waiting,
+            "in_flight": (
+                self.config.max_in_flight - self._in_flight.value
+                if self._in_flight
+                else 0
+            ),
+            "total_wait": self.total_wait,
+            "max_wait": self.max_wait,
+            "mean_wait": self.total_wait / self.requests if self.requests else 0.0,
+        }
@@ -0,0 +1,103 @@
+"""
+Lightweight provider registry.
+
+Lists the available providers and reads their metadata without importing them:
+provider modules pull in httpx, mcp and pydantic and build their tool schemas at
+import time, which is far too slow for commands like `odmcp list` or `odmcp info`.
+
+Providers are discovered in the `odmcp.providers` package and from the
+`odmcp.providers` entry point group, so that separately installed packages can
+register their own providers. Metadata is read statically from the module source:
+the module docstring and literal top level assignments such as `SUPPORTED_TYPES`.
+"""
+
+import ast
+import importlib.util
+import pkgutil
+from dataclasses import dataclass, field
+from importlib.metadata import entry_points
+from pathlib import Path
+
+PROVIDERS_PACKAGE = "odmcp.providers"
+ENTRY_POINT_GROUP = "odmcp.providers"
+
+# modules of the providers package which are not providers
+_IGNORED_MODULES = ("__template__", "__init__", "utils")
+
+
+@dataclass
+class ProviderInfo:
+    """Static metadata of a provider module."""
+
+    name: str
+    module: str
+    description: str | None = None
+    supported_types: list[str] = field(default_factory=list)
+
+
+def _entry_point_providers() -> dict[str, str]:
+    # providers are modules, the attribute of a 'module:attr' entry point is unused
+    return {ep.name: ep.module for ep in entry_points(group=ENTRY_POINT_GROUP)}
+
+
+def list_providers() -> list[str]:
+    """
+    List the names of the available providers, without importing them.
+
+    Returns:
+        The sorted provider names.
+    """
+    spec = importlib.util.find_spec(PROVIDERS_PACKAGE)
+    search_path = spec.submodule_search_locations if spec else None
+
+    names = {
+        name
+        for finder, name, ispkg in pkgutil.iter_modules(search_path or [])
+        if name not in _IGNORED_MODULES
+    }
+    names.update(_entry_point_providers())
+    return sorted(names)
+
+
+def provider_module(name: str) -> str:
+    """Return the import path of the provider `name`."""
+    return _entry_point_providers().get(name, f"{PROVIDERS_PACKAGE}.{name}")
+
+
+def get_provider_info(name: str) -> ProviderInfo | None:
+    """
+    Read the metadata of a provider from its source, without importing it.
+
+    Args:
+        name: The provider name, e.g. 'ch_sbb'.
+
+    Returns:
+        The provider metadata, or None if the provider does not exist.
+    """
+    module = provider_module(name)
+    try:
+        spec = importlib.util.find_spec(module)
+    except ImportError:
+        return None
+    if spec is None:
+        return None
+
+    info = ProviderInfo(name=name, module=module)
+    if not spec.origin or not spec.origin.endswith(".py"):
+        return info
+
+    tree = ast.parse(Path(spec.origin).read_text(encoding="utf-8"))
+    docstring = ast.get_docstring(tree)
+    info.description = docstring.strip() if docstring else None
+    for node in tree.body:
+        if (
+            isinstance(node, ast.Assign)
+            and len(node.targets) == 1
+            and isinstance(node.targets[0], ast.Name)
+            and node.targets[0].id == "SUPPORTED_TYPES"
+        ):
+            try:
+                info.supported_types = list(ast.literal_eval(node.value))
+            except ValueError:
+                pass
+    return info
@@ -0,0 +1,166 @@
+"""
+URI template routing of resource reads.
+
+Resource handlers are registered for URI templates with `{name}` placeholders, e.g.
+'sbb://linie/{linie}', and are called with the values of the placeholders as
+keyword arguments. Templates are compiled into a trie of URI segments, so a read is
+matched in time proportional to the length of its URI, whatever the number of
+templates or of records they address. A URI without placeholders is a template
+matching itself only.
+
+Handlers return the resource content as text or bytes, or a coroutine or an async
+iterator of chunks producing it, e.g. to stream it from an upstream export.
+"""
+
+import inspect
+import re
+from typing import Any, AsyncIterator, Awaitable, Callable
+from urllib.parse import unquote
+
+from pydantic import AnyUrl
+
+ResourceContent = str | bytes
+ResourceHandler = Callable[
+    ..., ResourceContent | Awaitable[ResourceContent] | AsyncIterator[ResourceContent]
+]
+
+# a placeholder spans a whole segment of the URI
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+
+class _Node:
+    """Segment of the templates trie."""
+
+    __slots__ = ("children", "param", "param_node", "handler")
+
+    def __init__(self):
+        self.children: dict[str, _Node] = {}
+        self.param: str | None = None
+        self.param_node: _Node | None = None
+        self.handler: ResourceHandler | None = None
+
+
+class ResourceRouter:
+    """Resource handlers by URI template."""
+
+    def __init__(self, handlers: dict[AnyUrl | str, ResourceHandler] | None = None):
+        self._root = _Node()
+        self._templates: list[str] = []
+        for template, handler in (handlers or {}).items():
+            self.add(template, handler)
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    @property
+    def templates(self) -> list[str]:
+        """The registered templates, in registration order."""
+        return list(self._templates)
+
+    def add(self, template: AnyUrl | str, handler: ResourceHandler) -> None:
+        """
+        Register the handler of the resources matching a URI template.
+
+        A placeholder spans a whole segment and matches any non-empty one. Literal
+        segments take precedence: 'x://a/latest' wins over 'x://a/{id}'.
+
+        Args:
+            template: The URI template, e.g. 'sbb://linie/{linie}'.
+            handler: The handler, called with the placeholder values.
+
+        Raises:
+            ValueError: If the template is already registered, repeats a
+                placeholder or has a placeholder within a segment.
+        """
+        template = str(template)
+        node = self._root
+        params: set[str] = set()
+        for segment in template.split("/"):
+            match = _PLACEHOLDER.fullmatch(segment)
+            if match is None:
+                if "{" in segment or "}" in segment:
+                    raise ValueError(
+                        f"Unsupported placeholder in {segment!r} of {template}"
+                    )
+                node = node.children.setdefault(segment, _Node())
+                continue
+
+            param = match.group(1)
+            if param in params:
+                raise ValueError(f"Placeholder {param} repeated in {template}")
+            params.add(param)
+            if node.param_node is None:
+                node.param, node.param_node = param, _Node()
+            elif node.param != param:
+                # sibling templates must agree on the name of a shared placeholder
+                raise ValueError(
+                    f"Placeholder {param} of {template} conflicts with {node.param}"
+                )
+            node = node.param_node
+
+        if node.handler is not None:
+            raise ValueError(f"Resource template {template} is already registered")
+        node.handler = handler
+        self._templates.append(template)
+
+    def match(self, uri: AnyUrl | str) -> tuple[ResourceHandler, dict[str, str]] | None:
+        """
+        Find the handler of a resource URI.
+
+        Args:
+            uri: The URI of the resource.
+
+        Returns:
+            The handler and the decoded placeholder values, or None if no template
+            matches.
+        """
+        segments = str(uri).split("/")
+        params: dict[str, str] = {}
+
+        def walk(node: _Node, index: int) -> _Node | None:
+            if index == len(segments):
+                return node if node.handler is not None else None
+            segment = segments[index]
+            child = node.children.get(segment)
+            if child is not None and (found := walk(child, index + 1)) is not None:
+                return found
+            if node.param_node is not None and segment:
+                found = walk(node.param_node, index + 1)
+                if found is not None:
+                    params[node.param] = unquote(segment)
+                    return found
+            return None
+
+        node = walk(self._root, 0)
+        if node is None:
+            return None
+        return node.handler, params
+
+    async def read(self, uri: AnyUrl | str) -> ResourceContent:
+        """
+        Read a resource with the handler of its URI.
+
+        Args:
+            uri: The URI of the resource.
+
+        Returns:
+            The resource content, the chunks of streaming handlers joined.
+
+        Raises:
+            LookupError: If no template matches the URI.
+        """
+        found = self.match(uri)
+        if found is None:
+            raise LookupError(f"Resource {uri} not found")
+        handler, params = found
+
+        content: Any = handler(**params)
+        if inspect.isawaitable(content):
+            content = await content
+        if isinstance(content, (str, bytes)):
+            return content
+
+        chunks = [chunk async for chunk in content]
+        if chunks and isinstance(chunks[0], bytes):
+            return b"".join(chunks)
+        return "".join(chunks)
@@ -0,0 +1,136 @@
+"""
+Retry policy for upstream requests.
+
+Transient upstream failures (HTTP 429, 502, 503, 504 and connection errors) are
+retried with capped exponential backoff and full jitter, honoring the
+`Retry-After` header sent with 429 and 503 responses. Retries are bounded both by a
+number of attempts and by a total deadline per call, so a tool call never hangs on
+an unstable upstream API.
+
+Only idempotent requests may be retried: `odmcp.http` applies the policy to its
+GET requests.
+"""
+
+import logging
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, ClassVar, TypeVar
+
+import anyio
+import httpx
+from pydantic import Field
+
+from odmcp.config import EnvConfig
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Parse a `Retry-After` header value.
+
+    Args:
+        value: Either a number of seconds or an HTTP date.
+
+    Returns:
+        The delay in seconds, or None if the value is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryPolicy(EnvConfig):
+    """Retry settings of the upstream requests."""
+
+    env_prefix: ClassVar[str] = "ODMCP_RETRY_"
+
+    max_attempts: int = Field(
+        default=3, ge=1, description="Maximum number of attempts, 1 disables retries"
+    )
+    backoff_base: float = Field(
+        default=0.5, ge=0, description="Backoff before the first retry in seconds"
+    )
+    backoff_max: float = Field(
+        default=10.0, ge=0, description="Maximum backoff between attempts in seconds"
+    )
+    deadline: float = Field(
+        default=60.0, gt=0, description="Total time allowed per call in seconds"
+    )
+    retry_statuses: frozenset[int] = Field(
+        default=frozenset({429, 502, 503, 504}),
+        description="HTTP status codes worth retrying",
+    )
+
+    def retry_delay(self, error: Exception, attempt: int) -> float | None:
+        """
+        Return the delay before retrying after a failed attempt.
+
+        Args:
+            error: The error raised by the attempt.
+            attempt: The number of the failed attempt, starting at 1.
+
+        Returns:
+            The delay in seconds, or None if the error is not retryable.
+        """
+        if isinstance(error, httpx.HTTPStatusError):
+            if error.response.status_code not in self.retry_statuses:
+                return None
+            retry_after = parse_retry_after(error.response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return retry_after
+        elif not isinstance(error, httpx.TransportError):
+            return None
+
+        # full jitter: spreads the retries of concurrent callers
+        return random.uniform(
+            0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        )
+
+    async def call(self, attempt: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `attempt` until it succeeds, fails permanently or runs out of time.
+
+        Args:
+            attempt: The idempotent request to run.
+
+        Returns:
+            The result of the first successful attempt.
+
+        Raises:
+            TimeoutError: If the deadline expires during an attempt.
+            Exception: The error of the last attempt, when it is not retryable or
+                no attempt or time is left.
+        """
+        deadline = anyio.current_time() + self.deadline
+        number = 0
+        while True:
+            number += 1
+            try:
+                with anyio.fail_after(max(0.0, deadline - anyio.current_time())):
+                    return await attempt()
+            except (httpx.HTTPStatusError, httpx.TransportError) as e:
+                delay = self.retry_delay(e, number)
+                if (
+                    delay is None
+                    or number == self.max_attempts
+                    or anyio.current_time() + delay >= deadline
+                ):
+                    raise
+                log.warning(
+                    f"Upstream request failed ({e}), retry {number} in {delay:.2f}s"
+                )
+                await anyio.sleep(delay)
@@ -0,0 +1,185 @@
+"""
+On-disk cache of the tool input schemas.
+
+Provider modules declare one tool per Pydantic parameters model, and generating
+every `model_json_schema()` at import time adds up once many providers are loaded.
+`model_json_schema` generates each schema once and stores it in a JSON file per
+provider module, so that later processes only read the file back. Each schema is
+keyed on a digest of its model definition (fields, annotations, defaults,
+descriptions and config, nested models included) and of the odmcp and pydantic
+versions, so editing a model, or a type it uses from another module, regenerates
+its schema.
+
+New schemas are written by `save_schema_cache`, once per module, which
+`create_mcp_server` calls after the providers are imported.
+
+The cache lives in `$ODMCP_CACHE_DIR/schemas`, or `~/.cache/odmcp/schemas` by default.
+Set `ODMCP_SCHEMA_CACHE=0` to disable it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import typing
+from pathlib import Path
+from typing import Any
+
+import pydantic
+from pydantic import BaseModel, ConfigDict
+
+from odmcp import __version__
+
+log = logging.getLogger(__name__)
+
+# memory addresses in reprs, e.g. of default factories, differ between processes
+_ADDRESS = re.compile(r" at 0x[0-9a-fA-F]+")
+
+
+class DeferredModel(BaseModel):
+    """
+    Base of the provider models, built on their first use.
+
+    Pydantic builds the validator of a model when its class is defined, which
+    dominates the import time of a provider. The tool schemas are read from the
+    cache, so a model is only built when it first validates or dumps data.
+    """
+
+    model_config = ConfigDict(defer_build=True)
+
+
+def schema_cache_dir() -> Path:
+    """Return the directory of the schema cache files."""
+    cache_dir = os.getenv("ODMCP_CACHE_DIR")
+    if cache_dir:
+        return Path(cache_dir) / "schemas"
+    xdg_cache = os.getenv("XDG_CACHE_HOME")
+    base = Path(xdg_cache) if xdg_cache else Path.home() / ".cache"
+    return base / "odmcp" / "schemas"
+
+
+def _nested_models(annotation: Any) -> list[type[BaseModel]]:
+    """Return the models used by a field annotation, e.g. in `Optional[List[M]]`."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return [annotation]
+    return [
+        model for arg in typing.get_args(annotation) for model in _nested_models(arg)
+    ]
+
+
+def model_digest(model: type[BaseModel]) -> str:
+    """
+    Return a digest of the definition of a model, as far as its schema depends on it.
+
+    The model is not built: models declared with `defer_build` stay deferred.
+
+    Args:
+        model: The Pydantic model.
+
+    Returns:
+        The hexadecimal digest.
+    """
+    definitions = [pydantic.VERSION, __version__]
+    seen: set[type[BaseModel]] = set()
+    pending = [model]
+    while pending:
+        current = pending.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        definitions.append(
+            repr(
+                (
+                    current.__module__,
+                    current.__qualname__,
+                    current.__doc__,
+                    dict(current.model_config),
+                    current.model_fields,
+                )
+            )
+        )
+        for field in current.model_fields.values():
+            pending.extend(_nested_models(field.annotation))
+
+    text = _ADDRESS.sub("", "\n".join(definitions))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class _ModuleSchemas:
+    """Schemas of the models of one module, backed by a cache file."""
+
+    def __init__(self, module_name: str):
+        self.module_name = module_name
+        self.path: Path | None = None
+        self.cached: dict[str, dict[str, Any]] = {}  # read from the cache file
+        self.schemas: dict[str, dict[str, Any]] = {}  # used by this process
+        self.dirty = False
+
+        if os.getenv("ODMCP_SCHEMA_CACHE", "1") == "0":
+            return
+
+        self.path = schema_cache_dir() / f"{module_name}.json"
+        try:
+            if self.path.exists():
+                self.cached = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            log.warning(f"Error reading schema cache of {module_name}: {e}")
+
+    def get(self, model: type[BaseModel]) -> dict[str, Any]:
+        key = model.__qualname__
+        entry = self.schemas.get(key)
+        if entry is None:
+            digest = model_digest(model) if self.path is not None else ""
+            entry = self.cached.get(key)
+            if entry is None or entry.get("digest") != digest:
+                entry = {"digest": digest, "schema": model.model_json_schema()}
+                self.dirty = True
+            self.schemas[key] = entry
+        return entry["schema"]
+
+    def save(self) -> None:
+        """
+        Write the schemas used by this process, if any was generated.
+
+        The file is written atomically, so concurrent processes never see a partial
+        file, and drops the schemas of the models no longer used.
+        """
+        if self.path is None or not self.dirty:
+            return
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.schemas, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except OSError as e:
+            log.warning(f"Error writing schema cache {self.path}: {e}")
+
+
+_MODULES: dict[str, _ModuleSchemas] = {}
+
+
+def model_json_schema(model: type[BaseModel]) -> dict[str, Any]:
+    """
+    Return the JSON schema of a model, generated once and cached on disk.
+
+    Args:
+        model: The Pydantic model, typically the parameters model of a tool.
+
+    Returns:
+        The JSON schema, as `model.model_json_schema()` would return it.
+    """
+    module_schemas = _MODULES.get(model.__module__)
+    if module_schemas is None:
+        module_schemas = _MODULES[model.__module__] = _ModuleSchemas(model.__module__)
+    return module_schemas.get(model)
+
+
+def save_schema_cache() -> None:
+    """Write the cache files of the modules with newly generated schemas."""
+    for module_schemas in _MODULES.values():
+        module_schemas.save()
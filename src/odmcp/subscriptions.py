@@ -0,0 +1,63 @@
+"""
+Resource subscriptions shared by the MCP servers of the process.
+
+`create_mcp_server` records here the client sessions subscribing to a resource URI.
+Provider modules polling an upstream API on behalf of all clients then call
+`notify` when the content of a resource changes, so that every subscriber receives
+a `notifications/resources/updated` message instead of polling the API itself.
+"""
+
+import logging
+from typing import Any
+from weakref import WeakSet
+
+import anyio
+from pydantic import AnyUrl
+
+log = logging.getLogger(__name__)
+
+
+class ResourceSubscriptions:
+    """Client sessions subscribed to each resource URI."""
+
+    def __init__(self):
+        # sessions are weakly referenced, closed sessions drop out on their own
+        self._sessions: dict[str, WeakSet[Any]] = {}
+
+    def subscribe(self, uri: AnyUrl | str, session: Any) -> None:
+        """Subscribe a client session to the updates of a resource."""
+        self._sessions.setdefault(str(uri), WeakSet()).add(session)
+
+    def unsubscribe(self, uri: AnyUrl | str, session: Any) -> None:
+        """Unsubscribe a client session from the updates of a resource."""
+        sessions = self._sessions.get(str(uri))
+        if sessions is not None:
+            sessions.discard(session)
+
+    def subscribers(self, uri: AnyUrl | str) -> int:
+        """Return the number of client sessions subscribed to a resource."""
+        return len(self._sessions.get(str(uri), ()))
+
+    async def notify(self, uri: AnyUrl | str) -> int:
+        """
+        Notify the subscribers of a resource that it was updated.
+
+        Args:
+            uri: The URI of the updated resource.
+
+        Returns:
+            The number of sessions notified. Sessions found closed are unsubscribed.
+        """
+        sessions = self._sessions.get(str(uri))
+        notified = 0
+        for session in list(sessions or ()):
+            try:
+                await session.send_resource_updated(AnyUrl(str(uri)))
+                notified += 1
+            except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+                sessions.discard(session)
+        log.debug(f"Notified {notified} subscribers of {uri}")
+        return notified
+
+
+SUBSCRIPTIONS = ResourceSubscriptions()
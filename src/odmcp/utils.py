@@ -1,17 +1,110 @@
 import logging
-from typing import Any, Callable, Sequence
+import os
+from contextlib import AsyncExitStack, nullcontext
+from types import ModuleType
+from typing import Any, Callable, Literal, Sequence
+from weakref import WeakKeyDictionary
 
+import anyio
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
 from mcp import types
-from mcp.server import Server
+from mcp.server import Server, request_ctx
+from mcp.server.models import InitializationOptions
+from mcp.server.session import ServerSession
+from mcp.server.stdio import stdio_server
+from mcp.shared.context import RequestContext
+from mcp.shared.exceptions import McpError
+from mcp.shared.session import RequestResponder
 from pydantic import AnyUrl
 
+from odmcp.resources import ResourceHandler, ResourceRouter
+from odmcp.schemas import save_schema_cache
+from odmcp.subscriptions import SUBSCRIPTIONS
+
 log = logging.getLogger(__name__)
 
 
+class ConcurrentServer(Server):
+    """
+    MCP server handling the requests of each client session concurrently.
+
+    The MCP SDK `Server.run` awaits each request before reading the next one, so a
+    client could never have two tool calls in flight. Here every request runs in
+    its own task, bounded per session by the `session_concurrency` limit of
+    `create_mcp_server`. The requests still running when the client closes the
+    session are cancelled.
+    """
+
+    async def run(
+        self,
+        read_stream: MemoryObjectReceiveStream[types.JSONRPCMessage | Exception],
+        write_stream: MemoryObjectSendStream[types.JSONRPCMessage],
+        initialization_options: InitializationOptions,
+        raise_exceptions: bool = False,
+    ) -> None:
+        async with (
+            ServerSession(read_stream, write_stream, initialization_options) as session,
+            anyio.create_task_group() as tg,
+        ):
+            async for message in session.incoming_messages:
+                match message:
+                    case RequestResponder(request=types.ClientRequest(root=request)):
+                        tg.start_soon(
+                            self._handle_request,
+                            session,
+                            message,
+                            request,
+                            raise_exceptions,
+                        )
+                    case types.ClientNotification(root=notification):
+                        await self._handle_notification(notification)
+            tg.cancel_scope.cancel()
+
+    async def _handle_request(
+        self,
+        session: ServerSession,
+        responder: RequestResponder[types.ClientRequest, types.ServerResult],
+        request: Any,
+        raise_exceptions: bool,
+    ) -> None:
+        handler = self.request_handlers.get(type(request))
+        if handler is None:
+            response: Any = types.ErrorData(
+                code=types.METHOD_NOT_FOUND, message="Method not found"
+            )
+        else:
+            # the request context is local to the task of the request
+            request_ctx.set(
+                RequestContext(responder.request_id, responder.request_meta, session)
+            )
+            try:
+                response = await handler(request)
+            except McpError as e:
+                response = e.error
+            except Exception as e:
+                if raise_exceptions:
+                    raise
+                response = types.ErrorData(code=0, message=str(e), data=None)
+
+        try:
+            await responder.respond(response)
+        except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+            log.debug(f"Session closed before the response to {responder.request_id}")
+
+    async def _handle_notification(self, notification: Any) -> None:
+        handler = self.notification_handlers.get(type(notification))
+        if handler is None:
+            return
+        try:
+            await handler(notification)
+        except Exception as e:
+            log.error(f"Error handling notification {type(notification).__name__}: {e}")
+
+
 def create_mcp_server(
     server_name: str,
     resources: list[types.Resource] = [],
-    resources_handlers: dict[AnyUrl, Callable[[AnyUrl], str | bytes]] = {},
+    resources_handlers: dict[AnyUrl | str, ResourceHandler] = {},
     tools: list[types.Tool] = [],
     tools_handlers: dict[
         str,
@@ -20,40 +113,112 @@ def create_mcp_server(
             Sequence[types.TextContent | types.ImageContent | types.EmbeddedResource],
         ],
     ] = {},
+    session_concurrency: int | None = None,
+    tools_timeouts: dict[str, float] = {},
+    tool_timeout: float | None = None,
+    resource_templates: list[types.ResourceTemplate] = [],
 ) -> Server:
     """
     Create a MCP server with the given tools and handlers.
 
+    Clients can subscribe to resources: providers announce their updates through
+    `odmcp.subscriptions.SUBSCRIPTIONS`.
+
+    Tool calls running past their deadline are cancelled, which aborts their
+    in-flight upstream requests, and reported to the client as errors. Calls are
+    likewise cancelled when the client session closes.
+
     Args:
         server_name: The name of the server.
+        resources: The list of resources to register.
+        resources_handlers: The resources handlers by URI template, e.g.
+            'sbb://linie/{linie}', see `odmcp.resources.ResourceRouter`.
         tools: The list of tools to register.
         tools_handlers: The dictionary of tools handlers.
+        session_concurrency: Maximum number of tool calls running at once for each
+            client session, unbounded if None.
+        tools_timeouts: Deadline in seconds of each tool call, by tool name.
+        tool_timeout: Deadline in seconds of the other tools, read from the
+            `ODMCP_TOOL_TIMEOUT` environment variable if not given. Unbounded if
+            neither is set.
+        resource_templates: The resource templates listed to the clients.
 
     Returns:
         The created MCP server.
     """
-    # instantiate the server
-    server = Server(server_name)
+    if tool_timeout is None and os.getenv("ODMCP_TOOL_TIMEOUT"):
+        tool_timeout = float(os.environ["ODMCP_TOOL_TIMEOUT"])
+
+    # the providers are imported by now, write the tool schemas they generated
+    save_schema_cache()
+
+    # instantiate the server, dispatching the requests of a session concurrently
+    server = ConcurrentServer(server_name)
+
+    # tool calls limiters, one per client session
+    session_limiters: WeakKeyDictionary[Any, anyio.CapacityLimiter] = (
+        WeakKeyDictionary()
+    )
 
     # register resources
     @server.list_resources()
     async def handle_list_resources() -> list[types.Resource]:
         return resources
 
-    # register resources handlers
-    # TODO: handle better the resource handler we probably dont want to have a handler per URI...
+    # register the resource templates, the response is built once as they are static
+    list_resource_templates_result = types.ServerResult(
+        types.ListResourceTemplatesResult(resourceTemplates=resource_templates)
+    )
+
+    async def handle_list_resource_templates(
+        request: types.ListResourceTemplatesRequest,
+    ) -> types.ServerResult:
+        return list_resource_templates_result
+
+    server.request_handlers[types.ListResourceTemplatesRequest] = (
+        handle_list_resource_templates
+    )
+
+    # register resources handlers, routed by URI template
+    router = ResourceRouter(resources_handlers)
+
     @server.read_resource()
     async def handle_read_resource(resource_uri: AnyUrl) -> str | bytes:
-        if resource_uri not in resources_handlers:
+        try:
+            return await router.read(resource_uri)
+        except LookupError:
             log.error(f"Resource {resource_uri} not found")
             raise AttributeError(f"Resource {resource_uri} not found")
 
-        return resources_handlers[resource_uri]()
+    # register resources subscriptions
+    @server.subscribe_resource()
+    async def handle_subscribe_resource(resource_uri: AnyUrl) -> None:
+        SUBSCRIPTIONS.subscribe(resource_uri, server.request_context.session)
+
+    @server.unsubscribe_resource()
+    async def handle_unsubscribe_resource(resource_uri: AnyUrl) -> None:
+        SUBSCRIPTIONS.unsubscribe(resource_uri, server.request_context.session)
+
+    # the SDK never advertises subscriptions, although it routes the requests
+    get_capabilities = server.get_capabilities
+
+    def get_capabilities_with_subscriptions(
+        *args, **kwargs
+    ) -> types.ServerCapabilities:
+        capabilities = get_capabilities(*args, **kwargs)
+        if capabilities.resources is not None:
+            capabilities.resources.subscribe = True
+        return capabilities
 
-    # register the tools
-    @server.list_tools()
-    async def handle_list_tools() -> list[types.Tool]:
-        return tools
+    server.get_capabilities = get_capabilities_with_subscriptions
+
+    # register the tools, the list_tools response is built once as tools are static
+    list_tools_result = types.ServerResult(types.ListToolsResult(tools=tools))
+
+    async def handle_list_tools(request: types.ListToolsRequest) -> types.ServerResult:
+        return list_tools_result
+
+    server.request_handlers[types.ListToolsRequest] = handle_list_tools
 
     # register the tools handlers
     @server.call_tool()
@@ -64,10 +229,199 @@ def create_mcp_server(
             log.error(f"Tool {name} not found")
             raise AttributeError(f"Tool {name} not found")
 
+        limiter = nullcontext()
+        if session_concurrency:
+            session = server.request_context.session
+            if session not in session_limiters:
+                session_limiters[session] = anyio.CapacityLimiter(session_concurrency)
+            limiter = session_limiters[session]
+
+        # the deadline includes the time spent queued behind the session limiter
+        timeout = tools_timeouts.get(name, tool_timeout)
         try:
-            return await tools_handlers[name](arguments)
+            with anyio.move_on_after(timeout):
+                async with limiter:
+                    return await tools_handlers[name](arguments)
         except Exception as e:
+            # including the timeouts of the handler itself, e.g. the retry deadline
             log.error(f"Error calling tool {name}: {e}")
             raise
 
+        # the call was cancelled by its deadline
+        log.error(f"Tool {name} timed out after {timeout}s")
+        raise TimeoutError(f"Tool {name} timed out after {timeout}s")
+
     return server
+
+
+def provider_name(module: ModuleType) -> str:
+    """Return the provider name of a provider module, e.g. 'ch_sbb'."""
+    if hasattr(module, "PROVIDER"):
+        return module.PROVIDER
+    return module.__name__.rsplit(".", 1)[-1]
+
+
+def _tools_prefix(module: ModuleType, prefix_tools: bool) -> str:
+    return f"{provider_name(module)}_" if prefix_tools else ""
+
+
+def merge_providers(
+    modules: Sequence[ModuleType], prefix_tools: bool = True
+) -> tuple[list[types.Resource], dict, list[types.Tool], dict]:
+    """
+    Merge the registration variables of several provider modules.
+
+    Tool names are prefixed with the provider name (e.g. 'ch_sbb_rolling-stock') so
+    that providers cannot collide. Resource URIs are already unique per provider.
+
+    Args:
+        modules: The imported provider modules.
+        prefix_tools: Whether to prefix the tool names with the provider name.
+
+    Returns:
+        The merged resources, resources handlers, tools and tools handlers, in the
+        order expected by `create_mcp_server`.
+    """
+    resources: list[types.Resource] = []
+    resources_handlers: dict = {}
+    tools: list[types.Tool] = []
+    tools_handlers: dict = {}
+    for module in modules:
+        prefix = _tools_prefix(module, prefix_tools)
+        resources.extend(module.RESOURCES)
+        resources_handlers.update(module.RESOURCES_HANDLERS)
+        for tool in module.TOOLS:
+            name = f"{prefix}{tool.name}"
+            tools.append(tool.model_copy(update={"name": name}))
+            tools_handlers[name] = module.TOOLS_HANDLERS[tool.name]
+
+    return resources, resources_handlers, tools, tools_handlers
+
+
+def merge_tools_timeouts(
+    modules: Sequence[ModuleType], prefix_tools: bool = True
+) -> dict[str, float]:
+    """
+    Merge the `TOOLS_TIMEOUTS` of several provider modules, if they define one.
+
+    Args:
+        modules: The imported provider modules.
+        prefix_tools: Whether to prefix the tool names with the provider name.
+
+    Returns:
+        The deadline in seconds of each tool, by (prefixed) tool name.
+    """
+    return {
+        f"{_tools_prefix(module, prefix_tools)}{name}": timeout
+        for module in modules
+        for name, timeout in getattr(module, "TOOLS_TIMEOUTS", {}).items()
+    }
+
+
+def merge_resource_templates(
+    modules: Sequence[ModuleType],
+) -> list[types.ResourceTemplate]:
+    """
+    Merge the `RESOURCE_TEMPLATES` of several provider modules, if they define one.
+
+    Args:
+        modules: The imported provider modules.
+
+    Returns:
+        The resource templates of all providers.
+    """
+    return [
+        template
+        for module in modules
+        for template in getattr(module, "RESOURCE_TEMPLATES", [])
+    ]
+
+
+async def run_sse_server(server: Server, host: str, port: int) -> None:
+    """
+    Serve a MCP server to many concurrent clients over HTTP with Server-Sent Events.
+
+    Clients open a session with `GET /sse` and post their messages to the endpoint
+    announced on that stream (`/messages/`). Every session runs on the same server
+    instance, so provider caches and connection pools are shared between clients.
+
+    Args:
+        server: The server to run.
+        host: The interface to bind.
+        port: The port to listen on.
+    """
+    try:
+        import uvicorn
+    except ImportError:
+        raise RuntimeError(
+            "The SSE transport requires uvicorn, install it with: "
+            "uv pip install 'odmcp[sse]'"
+        )
+    from mcp.server.sse import SseServerTransport
+    from starlette.responses import Response
+
+    sse = SseServerTransport("/messages/")
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        if scope["path"] == "/sse" and scope["method"] == "GET":
+            async with sse.connect_sse(scope, receive, send) as streams:
+                await server.run(
+                    streams[0], streams[1], server.create_initialization_options()
+                )
+        elif scope["path"] == "/messages/" and scope["method"] == "POST":
+            await sse.handle_post_message(scope, receive, send)
+        else:
+            await Response("Not Found", status_code=404)(scope, receive, send)
+
+    config = uvicorn.Config(app, host=host, port=port, lifespan="off")
+    await uvicorn.Server(config).serve()
+
+
+async def serve_providers(
+    modules: Sequence[ModuleType],
+    transport: Literal["stdio", "sse"] = "stdio",
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    session_concurrency: int | None = None,
+    prefix_tools: bool = True,
+) -> None:
+    """
+    Serve several providers from a single MCP server.
+
+    All providers share the process and its event loop. The `lifespan()` context of
+    each provider module, when defined, is entered before serving so that their
+    HTTP pools and background tasks are set up once.
+
+    Args:
+        modules: The imported provider modules.
+        transport: 'stdio' for a single client, or 'sse' to serve many clients over
+            HTTP.
+        host: The interface to bind with the 'sse' transport.
+        port: The port to listen on with the 'sse' transport.
+        session_concurrency: Maximum number of tool calls running at once for each
+            client session, unbounded if None.
+        prefix_tools: Whether to prefix the tool names with the provider name.
+    """
+    server = create_mcp_server(
+        "odmcp-" + "-".join(provider_name(module) for module in modules),
+        *merge_providers(modules, prefix_tools),
+        session_concurrency=session_concurrency,
+        tools_timeouts=merge_tools_timeouts(modules, prefix_tools),
+        resource_templates=merge_resource_templates(modules),
+    )
+
+    async with AsyncExitStack() as stack:
+        for module in modules:
+            if hasattr(module, "lifespan"):
+                await stack.enter_async_context(module.lifespan())
+
+        if transport == "sse":
+            await run_sse_server(server, host, port)
+            return
+
+        read_stream, write_stream = await stack.enter_async_context(stdio_server())
+        await server.run(
+            read_stream, write_stream, server.create_initialization_options()
+        )
@@ -0,0 +1,5 @@
+import os
+
+# providers are imported during collection, keep their tool schemas off the home
+# directory; tests/test_schemas.py enables the cache in a temporary directory
+os.environ["ODMCP_SCHEMA_CACHE"] = "0"
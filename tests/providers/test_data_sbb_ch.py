@@ -1,17 +1,35 @@
+import json
+import os
+import subprocess
+import sys
+
+import anyio
+import httpx
 import pytest
-from unittest.mock import patch, Mock
+from unittest.mock import AsyncMock, Mock, patch
 
+from odmcp.http import _CLIENTS
+from odmcp.providers import ch_sbb
 from odmcp.providers.ch_sbb import (
+    CACHE,
+    PROVIDER,
+    download_dataset,
+    handle_nearest_railway_lines,
+    handle_railway_lines_in_bbox,
+    iter_dataset_records,
     fetch_rail_traffic_info,
     TrafficInfoParams,
     handle_rail_traffic_info,
     fetch_railway_lines,
+    RailwayLineBBoxParams,
     RailwayLineParams,
     handle_railway_lines,
     fetch_rolling_stock,
     RollingStockParams,
     handle_rolling_stock,
 )
+from odmcp.resources import ResourceRouter
+from odmcp.subscriptions import SUBSCRIPTIONS
 
 
 @pytest.fixture
@@ -19,6 +37,11 @@ def anyio_backend():
     return "asyncio"
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    CACHE.clear()
+
+
 ###################
 # Rail Traffic Information
 ###################
@@ -53,13 +76,14 @@ def mock_traffic_info_response():
     }
 
 
-def test_fetch_rail_traffic_info(mock_traffic_info_response):
-    with patch("httpx.get") as mock_get:
-        mock_get.return_value.json.return_value = mock_traffic_info_response
+@pytest.mark.anyio
+async def test_fetch_rail_traffic_info(mock_traffic_info_response):
+    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
+        mock_get.return_value.json = Mock(return_value=mock_traffic_info_response)
         mock_get.return_value.raise_for_status = Mock()
 
         params = TrafficInfoParams(limit=2, timezone="Europe/Zurich")
-        response = fetch_rail_traffic_info(params)
+        response = await fetch_rail_traffic_info(params)
 
         assert response.total_count == 2
         assert len(response.results) == 2
@@ -69,8 +93,8 @@ def test_fetch_rail_traffic_info(mock_traffic_info_response):
 
 @pytest.mark.anyio
 async def test_handle_rail_traffic_info(mock_traffic_info_response):
-    with patch("httpx.get") as mock_get:
-        mock_get.return_value.json.return_value = mock_traffic_info_response
+    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
+        mock_get.return_value.json = Mock(return_value=mock_traffic_info_response)
         mock_get.return_value.raise_for_status = Mock()
 
         result = await handle_rail_traffic_info({"limit": 2})
@@ -133,13 +157,14 @@ def mock_railway_line_response():
     }
 
 
-def test_fetch_railway_lines(mock_railway_line_response):
-    with patch("httpx.get") as mock_get:
-        mock_get.return_value.json.return_value = mock_railway_line_response
+@pytest.mark.anyio
+async def test_fetch_railway_lines(mock_railway_line_response):
+    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
+        mock_get.return_value.json = Mock(return_value=mock_railway_line_response)
         mock_get.return_value.raise_for_status = Mock()
 
         params = RailwayLineParams(limit=2)
-        response = fetch_railway_lines(params)
+        response = await fetch_railway_lines(params)
 
         assert response.total_count == 2
         assert len(response.results) == 2
@@ -151,8 +176,8 @@ def test_fetch_railway_lines(mock_railway_line_response):
 
 @pytest.mark.anyio
 async def test_handle_railway_lines(mock_railway_line_response):
-    with patch("httpx.get") as mock_get:
-        mock_get.return_value.json.return_value = mock_railway_line_response
+    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
+        mock_get.return_value.json = Mock(return_value=mock_railway_line_response)
         mock_get.return_value.raise_for_status = Mock()
 
         result = await handle_railway_lines({"limit": 2})
@@ -163,6 +188,22 @@ async def test_handle_railway_lines(mock_railway_line_response):
         assert "Basel - Luzern" in result[0].text
 
 
+@pytest.mark.anyio
+async def test_railway_line_resource(mock_railway_line_response):
+    router = ResourceRouter(ch_sbb.RESOURCES_HANDLERS)
+    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
+        mock_get.return_value.json = Mock(return_value=mock_railway_line_response)
+        mock_get.return_value.raise_for_status = Mock()
+
+        content = json.loads(await router.read("sbb://linie/100"))
+
+        assert mock_get.call_args.kwargs["params"]["where"] == "linie = 100"
+        assert "encoded" in content["results"][0]["tst"]["geometry"]
+
+        with pytest.raises(ValueError):
+            await router.read("sbb://linie/hundred")
+
+
 ###################
 # Rolling Stock Information
 ###################
@@ -195,13 +236,14 @@ def mock_rolling_stock_response():
     }
 
 
-def test_fetch_rolling_stock(mock_rolling_stock_response):
-    with patch("httpx.get") as mock_get:
-        mock_get.return_value.json.return_value = mock_rolling_stock_response
+@pytest.mark.anyio
+async def test_fetch_rolling_stock(mock_rolling_stock_response):
+    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
+        mock_get.return_value.json = Mock(return_value=mock_rolling_stock_response)
         mock_get.return_value.raise_for_status = Mock()
 
         params = RollingStockParams(limit=2)
-        response = fetch_rolling_stock(params)
+        response = await fetch_rolling_stock(params)
 
         assert response.total_count == 2
         assert len(response.results) == 2
@@ -211,8 +253,8 @@ def test_fetch_rolling_stock(mock_rolling_stock_response):
 
 @pytest.mark.anyio
 async def test_handle_rolling_stock(mock_rolling_stock_response):
-    with patch("httpx.get") as mock_get:
-        mock_get.return_value.json.return_value = mock_rolling_stock_response
+    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
+        mock_get.return_value.json = Mock(return_value=mock_rolling_stock_response)
         mock_get.return_value.raise_for_status = Mock()
 
         result = await handle_rolling_stock({"limit": 2})
@@ -221,3 +263,570 @@ async def test_handle_rolling_stock(mock_rolling_stock_response):
         assert result[0].type == "text"
         assert "Re 460" in result[0].text
         assert "IC 2000" in result[0].text
+
+
+###################
+# Response Cache
+###################
+
+
+@pytest.mark.anyio
+async def test_fetch_uses_response_cache(mock_rolling_stock_response):
+    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
+        mock_get.return_value.json = Mock(return_value=mock_rolling_stock_response)
+        mock_get.return_value.raise_for_status = Mock()
+
+        first = await fetch_rolling_stock(RollingStockParams(limit=2, offset=0))
+        second = await fetch_rolling_stock(RollingStockParams(offset=0, limit=2))
+        await fetch_rolling_stock(RollingStockParams(limit=3))
+
+        assert first == second
+        assert mock_get.await_count == 2
+        assert CACHE.stats() == {"hits": 1, "misses": 2, "stale_hits": 0, "size": 2}
+
+
+@pytest.mark.anyio
+async def test_fetch_serves_stale_while_revalidating(
+    mock_rolling_stock_response, monkeypatch
+):
+    now = 0.0
+    monkeypatch.setattr(CACHE, "clock", lambda: now)
+    monkeypatch.setenv("ODMCP_WARMUP", "0")
+
+    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
+        mock_get.return_value.json = Mock(return_value=mock_rolling_stock_response)
+        mock_get.return_value.raise_for_status = Mock()
+
+        async with ch_sbb.lifespan():
+            fresh = await fetch_rolling_stock(RollingStockParams(limit=2))
+            now = ch_sbb.CACHE_TTLS["rolling-stock"] + 1
+            stale = await fetch_rolling_stock(RollingStockParams(limit=2))
+            await anyio.wait_all_tasks_blocked()
+
+        assert fresh.stale is None
+        assert stale.stale is True
+        assert stale.results == fresh.results
+        assert mock_get.await_count == 2  # refreshed in the background
+
+
+###################
+# Warm-up
+###################
+
+
+def test_warmup_names(monkeypatch):
+    monkeypatch.delenv("ODMCP_WARMUP", raising=False)
+    assert "railway-line-index" not in ch_sbb.warmup_names()
+
+    monkeypatch.setenv("ODMCP_WARMUP", "all")
+    assert ch_sbb.warmup_names() == list(ch_sbb.WARMUP_TASKS)
+
+    monkeypatch.setenv("ODMCP_WARMUP", "0")
+    assert ch_sbb.warmup_names() == []
+
+    monkeypatch.setenv("ODMCP_WARMUP", "rolling-stock, unknown")
+    assert ch_sbb.warmup_names() == ["rolling-stock"]
+
+
+@pytest.mark.anyio
+async def test_warm_up_fills_cache(mock_rolling_stock_response, monkeypatch):
+    monkeypatch.setenv("ODMCP_WARMUP", "rolling-stock")
+
+    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
+        mock_get.return_value.json = Mock(return_value=mock_rolling_stock_response)
+        mock_get.return_value.raise_for_status = Mock()
+
+        async with ch_sbb.lifespan():
+            await anyio.wait_all_tasks_blocked()
+            assert mock_get.await_count == 1
+
+            await fetch_rolling_stock(RollingStockParams())
+            assert mock_get.await_count == 1
+
+
+###################
+# Pagination
+###################
+
+
+@pytest.mark.anyio
+async def test_fetch_pages_through_results():
+    total_count = 250
+
+    async def mock_get(url, params):
+        offset, limit = params["offset"], params["limit"]
+        results = [
+            {"objekt": str(i)} for i in range(offset, min(offset + limit, total_count))
+        ]
+        response = Mock()
+        response.json = Mock(return_value={"total_count": 250, "results": results})
+        return response
+
+    with patch("httpx.AsyncClient.get", new=AsyncMock(side_effect=mock_get)) as get:
+        response = await fetch_rolling_stock(
+            RollingStockParams(offset=20, max_records=500)
+        )
+
+        assert get.await_count == 3
+        assert response.total_count == 250
+        assert [r.objekt for r in response.results] == [str(i) for i in range(20, 250)]
+        assert all(
+            "max_records" not in call.kwargs["params"] for call in get.mock_calls
+        )
+
+
+@pytest.mark.anyio
+async def test_fetch_pages_fails_with_the_page_error():
+    async def mock_get(url, params):
+        response = Mock()
+        response.json = Mock(return_value={"total_count": 250, "results": []})
+        if params["offset"] > 0:
+            request = httpx.Request("GET", url)
+            response.raise_for_status = Mock(
+                side_effect=httpx.HTTPStatusError(
+                    "400 Bad Request",
+                    request=request,
+                    response=httpx.Response(400, request=request),
+                )
+            )
+        return response
+
+    with patch("httpx.AsyncClient.get", new=AsyncMock(side_effect=mock_get)):
+        with pytest.raises(httpx.HTTPStatusError, match="400 Bad Request"):
+            await fetch_rolling_stock(RollingStockParams(max_records=500))
+
+
+###################
+# Bulk Exports
+###################
+
+
+@pytest.fixture
+def mock_export_client(monkeypatch):
+    lines = b'{"linie": 100}\n{"linie": 200}\n\n{"linie": 300}\n'
+
+    def handler(request):
+        assert "/catalog/datasets/linie/exports/" in request.url.path
+        return httpx.Response(200, content=lines)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setitem(_CLIENTS, PROVIDER, client)
+    return lines
+
+
+@pytest.mark.anyio
+async def test_iter_dataset_records(mock_export_client):
+    records = [record async for record in iter_dataset_records("linie")]
+
+    assert records == [{"linie": 100}, {"linie": 200}, {"linie": 300}]
+
+
+@pytest.mark.anyio
+async def test_download_dataset(mock_export_client, tmp_path):
+    path = tmp_path / "linie.jsonl"
+
+    written = await download_dataset("linie", path, format="jsonl")
+
+    assert written == len(mock_export_client)
+    assert path.read_bytes() == mock_export_client
+
+
+###################
+# Output Formats
+###################
+
+
+@pytest.mark.anyio
+async def test_handle_rolling_stock_csv_output(mock_rolling_stock_response):
+    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
+        mock_get.return_value.json = Mock(return_value=mock_rolling_stock_response)
+        mock_get.return_value.raise_for_status = Mock()
+
+        result = await handle_rolling_stock(
+            {"select": "fahrzeug_typ,objekt", "output_format": "csv"}
+        )
+
+        assert result[0].text.splitlines() == [
+            "# total_count: 2",
+            "fahrzeug_typ,objekt",
+            "Re 460,460 001-1",
+            "IC 2000,IC2000-1234",
+        ]
+        assert "output_format" not in mock_get.call_args.kwargs["params"]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "geometry, expected",
+    [
+        ("none", None),
+        (
+            "simplified",
+            {
+                "type": "LineString",
+                "coordinates": [[8.5402, 47.3782], [7.4391, 46.9491]],
+            },
+        ),
+        ("polyline", {"type": "LineString", "encoded": "kj|[sxeDdkGdoT"}),
+    ],
+)
+async def test_fetch_railway_lines_geometry(
+    mock_railway_line_response, geometry, expected
+):
+    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
+        mock_get.return_value.json = Mock(return_value=mock_railway_line_response)
+        mock_get.return_value.raise_for_status = Mock()
+
+        response = await fetch_railway_lines(
+            RailwayLineParams(limit=2, geometry=geometry, coordinate_precision=4)
+        )
+
+        result = response.model_dump(exclude_none=True)["results"][0]
+        assert result.get("tst", {}).get("geometry") == expected
+        assert "geometry" not in mock_get.call_args.kwargs["params"]
+
+    # the cached raw record keeps its full geometry
+    raw = await fetch_railway_lines(RailwayLineParams(limit=2))
+    assert raw.results[0].tst.geometry.coordinates[0] == [8.540192, 47.378177]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "geometry, expected",
+    [
+        ("simplified", [[[8.5402, 47.3782], [7.4391, 46.9491]]] * 2),
+        ("polyline", ["kj|[sxeDdkGdoT"] * 2),
+    ],
+)
+async def test_multi_line_geometry_is_reduced_per_part(
+    mock_railway_line_response, geometry, expected
+):
+    record = mock_railway_line_response["results"][0]
+    line = record["tst"]["geometry"]["coordinates"]
+    record["tst"]["geometry"] = {"type": "MultiLineString", "coordinates": [line] * 2}
+
+    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
+        mock_get.return_value.json = Mock(return_value=mock_railway_line_response)
+        mock_get.return_value.raise_for_status = Mock()
+
+        response = await fetch_railway_lines(
+            RailwayLineParams(limit=2, geometry=geometry, coordinate_precision=4)
+        )
+
+    result = response.model_dump(exclude_none=True)["results"][0]
+    reduced = result["tst"]["geometry"]
+    assert reduced["type"] == "MultiLineString"
+    assert reduced.get("coordinates", reduced.get("encoded")) == expected
+
+
+###################
+# Local Dataset Snapshots
+###################
+
+
+@pytest.fixture
+def rolling_stock_snapshot(mock_rolling_stock_response, monkeypatch):
+    """Serve the rolling stock export and the records endpoint from mocks."""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if "/exports/" in request.url.path:
+            lines = "\n".join(
+                json.dumps(record) for record in mock_rolling_stock_response["results"]
+            )
+            return httpx.Response(200, content=lines.encode())
+        return httpx.Response(200, json=mock_rolling_stock_response)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setitem(_CLIENTS, PROVIDER, client)
+    monkeypatch.setenv("ODMCP_LOCAL_DATASETS", "rollmaterial")
+    monkeypatch.setattr(ch_sbb, "SNAPSHOTS", {})
+    return requests
+
+
+@pytest.mark.anyio
+async def test_rolling_stock_queried_locally(rolling_stock_snapshot):
+    params = RollingStockParams(
+        where='fahrzeug_typ = "IC 2000" OR eigengewicht_tara > 80',
+        order_by="eigengewicht_tara ASC",
+        limit=1,
+    )
+
+    first = await fetch_rolling_stock(params)
+    second = await fetch_rolling_stock(params.model_copy(update={"offset": 1}))
+
+    assert first.total_count == 2
+    assert [r.objekt for r in first.results + second.results] == [
+        "IC2000-1234",
+        "460 001-1",
+    ]
+    # the export is downloaded once, no records request is sent
+    assert len(rolling_stock_snapshot) == 1
+
+
+@pytest.mark.anyio
+async def test_unsupported_query_falls_back_upstream(rolling_stock_snapshot):
+    response = await fetch_rolling_stock(
+        RollingStockParams(where='fahrzeug_typ LIKE "*Re*"')
+    )
+
+    assert response.total_count == 2
+    assert len(rolling_stock_snapshot) == 1
+    assert "/records" in rolling_stock_snapshot[0].url.path
+
+
+@pytest.mark.anyio
+async def test_rail_traffic_info_synced_incrementally(
+    mock_traffic_info_response, monkeypatch
+):
+    exported = mock_traffic_info_response["results"]
+    new_message = {**exported[0], "link": "https://data.sbb.ch/info/3"}
+    new_message["published"] = "2024-01-05T10:00:00Z"
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if "/exports/" in request.url.path:
+            lines = "\n".join(json.dumps(record) for record in exported)
+            return httpx.Response(200, content=lines.encode())
+        # the newest known message is returned again with the new one
+        results = [exported[-1], new_message]
+        return httpx.Response(200, json={"total_count": 2, "results": results})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setitem(_CLIENTS, PROVIDER, client)
+    monkeypatch.setenv("ODMCP_LOCAL_DATASETS", "rail-traffic-information")
+    monkeypatch.setattr(ch_sbb, "SNAPSHOTS", {})
+    params = TrafficInfoParams(order_by="published DESC", limit=5)
+
+    first = await fetch_rail_traffic_info(params)
+    ch_sbb.SNAPSHOTS["rail-traffic-information"].updated_at -= 3600
+    second = await fetch_rail_traffic_info(params)
+
+    assert first.total_count == 2
+    assert second.total_count == 3
+    assert second.results[0].link == "https://data.sbb.ch/info/3"
+    newest = max(record["published"] for record in exported)
+    assert requests[1].url.params["where"] == f"published >= date'{newest}'"
+
+    # edits and removals are picked up by a full reload
+    ch_sbb.SNAPSHOTS["rail-traffic-information"].updated_at -= 3600
+    ch_sbb.SNAPSHOTS["rail-traffic-information"].reconciled_at -= 3600
+    third = await fetch_rail_traffic_info(params)
+
+    assert third.total_count == 2
+    assert "/exports/" in requests[2].url.path
+
+    # refine is not supported locally
+    await fetch_rail_traffic_info(params.model_copy(update={"refine": "author:SBB"}))
+    assert requests[3].url.path.endswith("/records")
+
+
+###################
+# Aggregations
+###################
+
+
+@pytest.mark.anyio
+async def test_aggregate_pushed_upstream():
+    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
+        mock_get.return_value.json = Mock(
+            return_value={"results": [{"author": "SBB", "n": 12}]}
+        )
+        mock_get.return_value.raise_for_status = Mock()
+
+        result = await ch_sbb.TOOLS_HANDLERS["rail-traffic-info-aggregate"](
+            {"aggregates": "count(*) as n", "group_by": "author"}
+        )
+
+        assert result[0].text == "author,n\nSBB,12\n"
+        url, params = mock_get.await_args.args[0], mock_get.await_args.kwargs["params"]
+        assert url.endswith("/rail-traffic-information/records")
+        assert params["select"] == "author, count(*) as n"
+        assert params["group_by"] == "author"
+        assert "aggregates" not in params
+
+
+@pytest.mark.anyio
+async def test_aggregate_on_local_snapshot(rolling_stock_snapshot):
+    result = await ch_sbb.TOOLS_HANDLERS["rolling-stock-aggregate"](
+        {
+            "aggregates": "count(*) as n, avg(eigengewicht_tara) as tara",
+            "group_by": "vmax_betrieblich_zugelassen",
+            "output_format": "json",
+        }
+    )
+
+    assert json.loads(result[0].text) == {
+        "total_count": 1,
+        "results": [{"vmax_betrieblich_zugelassen": 200, "n": 2, "tara": 63.25}],
+    }
+    assert "/exports/" in rolling_stock_snapshot[0].url.path
+
+
+@pytest.mark.anyio
+async def test_aggregate_of_text_falls_back_upstream(rolling_stock_snapshot):
+    await ch_sbb.TOOLS_HANDLERS["rolling-stock-aggregate"](
+        {"aggregates": "avg(fahrzeug_typ) as typ", "output_format": "json"}
+    )
+
+    assert [request.url.path.split("/")[-1] for request in rolling_stock_snapshot] == [
+        "jsonl",
+        "records",
+    ]
+
+
+###################
+# Facets
+###################
+
+
+@pytest.mark.anyio
+async def test_facets_are_flattened_and_cached():
+    facets = {
+        "facets": [
+            {
+                "name": "fahrzeug_typ",
+                "facets": [
+                    {"name": "IC 2000", "value": "IC 2000", "count": 3},
+                    {"name": "Re 460", "value": "Re 460", "count": 119},
+                    {"name": "RABe 511", "value": "RABe 511", "count": 60},
+                ],
+            }
+        ]
+    }
+    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
+        mock_get.return_value.json = Mock(return_value=facets)
+        mock_get.return_value.raise_for_status = Mock()
+
+        handler = ch_sbb.TOOLS_HANDLERS["rolling-stock-facets"]
+        arguments = {"facet": ["fahrzeug_typ"], "max_values": 2, "output_format": "csv"}
+        result = await handler(arguments)
+        await handler(arguments)
+
+        assert result[0].text == "facet,value,count\n" + (
+            "fahrzeug_typ,Re 460,119\nfahrzeug_typ,RABe 511,60\n"
+        )
+        assert mock_get.await_count == 1
+        url, params = mock_get.await_args.args[0], mock_get.await_args.kwargs["params"]
+        assert url.endswith("/rollmaterial/facets")
+        assert params == {"facet": ["fahrzeug_typ"]}
+
+
+###################
+# Active Disruptions
+###################
+
+
+@pytest.mark.anyio
+async def test_active_disruptions_notify_subscribers_on_change(
+    mock_traffic_info_response, monkeypatch
+):
+    responses = [mock_traffic_info_response] * 2 + [
+        {"total_count": 1, "results": mock_traffic_info_response["results"][:1]}
+    ]
+    requests = []
+
+    def respond(request):
+        requests.append(request)
+        return httpx.Response(200, json=responses.pop(0))
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(respond))
+    monkeypatch.setitem(_CLIENTS, PROVIDER, client)
+    monkeypatch.setattr(ch_sbb, "ACTIVE_DISRUPTIONS", None)
+    subscriber = Mock(send_resource_updated=AsyncMock())
+    SUBSCRIPTIONS.subscribe(ch_sbb.ACTIVE_DISRUPTIONS_URI, subscriber)
+
+    try:
+        handler = ch_sbb.RESOURCES_HANDLERS[ch_sbb.ACTIVE_DISRUPTIONS_URI]
+        assert json.loads(await handler())["total_count"] == 2
+
+        # unchanged, then a disruption ended
+        for _ in range(2):
+            CACHE.clear()
+            await ch_sbb.refresh_active_disruptions()
+    finally:
+        SUBSCRIPTIONS.unsubscribe(ch_sbb.ACTIVE_DISRUPTIONS_URI, subscriber)
+
+    subscriber.send_resource_updated.assert_awaited_once()
+    # planned disruptions that have not started yet are not active
+    assert requests[0].url.params["where"].startswith("validitybegin <= now()")
+    assert json.loads(await handler())["total_count"] == 1
+
+
+def test_models_stay_deferred_on_import(tmp_path):
+    script = (
+        "from odmcp.providers import ch_sbb\n"
+        "from odmcp.schemas import save_schema_cache\n"
+        "save_schema_cache()\n"
+        "print(ch_sbb.TrafficInfoParams.__pydantic_complete__)\n"
+    )
+    env = {**os.environ, "ODMCP_SCHEMA_CACHE": "1", "ODMCP_CACHE_DIR": str(tmp_path)}
+
+    # the first import fills the schema cache, the next ones only read it
+    outputs = [
+        subprocess.run(
+            [sys.executable, "-c", script],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        for _ in range(2)
+    ]
+
+    assert outputs == ["True", "False"]
+
+
+###################
+# Railway Line Spatial Index
+###################
+
+
+@pytest.fixture
+def mock_line_index(monkeypatch, mock_railway_line_response):
+    lines = "\n".join(json.dumps(r) for r in mock_railway_line_response["results"])
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, content=lines.encode())
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setitem(_CLIENTS, PROVIDER, client)
+    monkeypatch.setattr(ch_sbb, "LINE_INDEX", None)
+    return requests
+
+
+@pytest.mark.anyio
+async def test_handle_nearest_railway_lines(mock_line_index):
+    result = await handle_nearest_railway_lines({"lon": 7.44, "lat": 46.95})
+    data = json.loads(result[0].text)
+
+    assert data["results"][0]["linienname"] == "Zürich HB - Bern"
+    assert data["results"][0]["distance_km"] < 1
+    assert [r["linie"] for r in data["results"]] == [100, 200]
+
+    # the index is built once from the export and then queried locally
+    await handle_nearest_railway_lines({"lon": 7.6, "lat": 47.5, "limit": 1})
+    assert len(mock_line_index) == 1
+    assert "/linie/exports/jsonl" in mock_line_index[0].url.path
+
+
+@pytest.mark.anyio
+async def test_handle_railway_lines_in_bbox(mock_line_index):
+    result = await handle_railway_lines_in_bbox(
+        {"min_lon": 7.5, "min_lat": 47.5, "max_lon": 7.7, "max_lat": 47.6}
+    )
+    data = json.loads(result[0].text)
+
+    assert data["total_count"] == 1
+    assert data["results"][0]["linie"] == 200
+
+
+def test_swapped_bbox_is_rejected():
+    with pytest.raises(ValueError, match="min_lon"):
+        RailwayLineBBoxParams(min_lon=7.7, min_lat=47.5, max_lon=7.5, max_lat=47.6)
+    with pytest.raises(ValueError, match="min_lat"):
+        RailwayLineBBoxParams(min_lon=7.5, min_lat=47.6, max_lon=7.7, max_lat=47.5)
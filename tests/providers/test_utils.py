@@ -1,16 +1,29 @@
 import logging
+from types import SimpleNamespace
 from typing import Any, Sequence
 
+import anyio
 import mcp.types as types
 import pytest
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 from mcp.server.stdio import stdio_server
+from mcp.shared.memory import (
+    create_client_server_memory_streams,
+    create_connected_server_and_client_session,
+)
+from pydantic import AnyUrl
 
-from odmcp.utils import create_mcp_server
+from odmcp.utils import create_mcp_server, merge_providers, merge_tools_timeouts
 
 log = logging.getLogger(__name__)
 
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
 RESOURCES = []
 RESOURCES_HANDLERS = {}
 TOOLS = [
@@ -88,3 +101,173 @@ async def test_client_server_interaction():
             assert result.content[0].type == "text"
             log.info(f"Result: {result.content[0]}")
             assert result.content[0].text == "Hello Alice!"
+
+
+def test_merge_providers():
+    first = SimpleNamespace(
+        PROVIDER="first",
+        RESOURCES=[],
+        RESOURCES_HANDLERS={},
+        TOOLS=TOOLS,
+        TOOLS_HANDLERS=TOOLS_HANDLERS,
+    )
+    second = SimpleNamespace(
+        __name__="odmcp.providers.second",
+        RESOURCES=[],
+        RESOURCES_HANDLERS={},
+        TOOLS=TOOLS,
+        TOOLS_HANDLERS=TOOLS_HANDLERS,
+    )
+
+    resources, resources_handlers, tools, tools_handlers = merge_providers(
+        [first, second]
+    )
+
+    assert [tool.name for tool in tools] == ["first_test-tool", "second_test-tool"]
+    assert tools_handlers["second_test-tool"] is handle_test_tool
+    assert TOOLS[0].name == "test-tool"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("session_concurrency,expected_peak", [(2, 2), (None, 4)])
+async def test_session_concurrency_limit(session_concurrency, expected_peak):
+    running = peak = 0
+
+    async def handle_slow_tool(arguments=None):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await anyio.sleep(0.05)
+        running -= 1
+        return [types.TextContent(type="text", text="done")]
+
+    limited_server = create_mcp_server(
+        "test",
+        RESOURCES,
+        RESOURCES_HANDLERS,
+        TOOLS,
+        {"test-tool": handle_slow_tool},
+        session_concurrency,
+    )
+
+    async with create_connected_server_and_client_session(limited_server) as session:
+        async with anyio.create_task_group() as tg:
+            for _ in range(4):
+                tg.start_soon(session.call_tool, "test-tool", {"name": "Bob"})
+
+    assert peak == expected_peak
+
+
+def test_merge_tools_timeouts():
+    first = SimpleNamespace(PROVIDER="first", TOOLS_TIMEOUTS={"test-tool": 5})
+    second = SimpleNamespace(PROVIDER="second")
+
+    assert merge_tools_timeouts([first, second]) == {"first_test-tool": 5}
+    assert merge_tools_timeouts([first], prefix_tools=False) == {"test-tool": 5}
+
+
+@pytest.mark.anyio
+async def test_tool_timeout_cancels_handler():
+    cancelled = anyio.Event()
+
+    async def handle_slow_tool(arguments=None):
+        try:
+            await anyio.sleep(10)
+        finally:
+            cancelled.set()
+
+    slow_server = create_mcp_server(
+        "test",
+        RESOURCES,
+        RESOURCES_HANDLERS,
+        TOOLS,
+        {"test-tool": handle_slow_tool},
+        tools_timeouts={"test-tool": 0.05},
+    )
+
+    async with create_connected_server_and_client_session(slow_server) as session:
+        result = await session.call_tool("test-tool", arguments={"name": "Bob"})
+
+    assert result.isError
+    assert "timed out" in result.content[0].text
+    assert cancelled.is_set()
+
+
+@pytest.mark.anyio
+async def test_resources_routed_by_template():
+    async def handle_line(linie: str) -> str:
+        return f"line {linie}"
+
+    template = types.ResourceTemplate(uriTemplate="test://linie/{linie}", name="Line")
+    routed_server = create_mcp_server(
+        "test",
+        RESOURCES,
+        {"test://linie/{linie}": handle_line},
+        resource_templates=[template],
+    )
+
+    async with create_connected_server_and_client_session(routed_server) as session:
+        templates = await session.send_request(
+            types.ClientRequest(
+                types.ListResourceTemplatesRequest(method="resources/templates/list")
+            ),
+            types.ListResourceTemplatesResult,
+        )
+        result = await session.read_resource(AnyUrl("test://linie/100"))
+
+    assert templates.resourceTemplates == [template]
+    assert result.contents[0].text == "line 100"
+
+
+@pytest.mark.anyio
+async def test_handler_timeouts_are_not_reported_as_tool_deadline():
+    async def handle_retrying_tool(arguments=None):
+        raise TimeoutError("Upstream retry deadline exceeded")
+
+    retrying_server = create_mcp_server(
+        "test",
+        RESOURCES,
+        RESOURCES_HANDLERS,
+        TOOLS,
+        {"test-tool": handle_retrying_tool},
+    )
+
+    async with create_connected_server_and_client_session(retrying_server) as session:
+        result = await session.call_tool("test-tool", arguments={"name": "Bob"})
+
+    assert result.isError
+    assert result.content[0].text == "Upstream retry deadline exceeded"
+
+
+@pytest.mark.anyio
+async def test_closed_session_cancels_handler():
+    started, cancelled = anyio.Event(), anyio.Event()
+
+    async def handle_slow_tool(arguments=None):
+        started.set()
+        try:
+            await anyio.sleep(10)
+        finally:
+            cancelled.set()
+
+    slow_server = create_mcp_server(
+        "test", RESOURCES, RESOURCES_HANDLERS, TOOLS, {"test-tool": handle_slow_tool}
+    )
+
+    async with create_client_server_memory_streams() as (client, server_streams):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(
+                lambda: slow_server.run(
+                    *server_streams, slow_server.create_initialization_options()
+                )
+            )
+            async with ClientSession(*client) as session:
+                await session.initialize()
+                tg.start_soon(session.call_tool, "test-tool", {"name": "Bob"})
+                await started.wait()
+
+                # the client goes away, the server sees the end of its stream
+                await client[1].aclose()
+                with anyio.fail_after(1):
+                    await cancelled.wait()
+                tg.cancel_scope.cancel()
@@ -0,0 +1,195 @@
+import anyio
+import pytest
+
+from odmcp.cache import DiskCache, SingleFlight, TTLCache, make_cache_key
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_make_cache_key_is_canonical():
+    assert make_cache_key("https://x", {"a": 1, "b": 2}) == make_cache_key(
+        "https://x", {"b": 2, "a": 1}
+    )
+    assert make_cache_key("https://x", {"a": 1}) != make_cache_key(
+        "https://y", {"a": 1}
+    )
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = TTLCache(ttl=10, clock=clock)
+    cache.set("short", 1, ttl=1)
+    cache.set("default", 2)
+
+    clock.now = 5
+    assert cache.get("short") is None
+    assert cache.get("default") == 2
+    assert cache.stats() == {"hits": 1, "misses": 1, "stale_hits": 0, "size": 1}
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" becomes the least recently used entry
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+@pytest.mark.anyio
+async def test_get_or_fetch():
+    cache = TTLCache()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return {"value": len(calls)}
+
+    assert await cache.get_or_fetch("key", fetch) == {"value": 1}
+    assert await cache.get_or_fetch("key", fetch) == {"value": 1}
+    assert len(calls) == 1
+
+
+@pytest.mark.anyio
+async def test_get_or_revalidate_serves_stale_entries():
+    clock = FakeClock()
+    cache = TTLCache(clock=clock)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return len(calls)
+
+    async with anyio.create_task_group() as tg:
+        assert await cache.get_or_revalidate("key", fetch, 10, 100, tg) == (1, False)
+
+        clock.now = 50  # expired, within the stale window
+        assert await cache.get_or_revalidate("key", fetch, 10, 100, tg) == (1, True)
+
+    # refreshed once in the background
+    assert cache.get("key") == 2
+    assert cache.stats()["stale_hits"] == 1
+
+    clock.now = 500  # too stale to be served
+    assert await cache.get_or_revalidate("key", fetch, 10, 100, tg) == (3, False)
+
+
+def test_disk_cache_shared_between_instances(tmp_path):
+    writer = DiskCache(tmp_path / "cache.sqlite3")
+    reader = DiskCache(tmp_path / "cache.sqlite3")
+    writer.set("key", {"value": 1}, ttl=60)
+
+    expires_at, value = reader.get("key")
+    assert value == {"value": 1}
+    assert reader.get("expired") is None
+
+    writer.set("expired", 1, ttl=-1)
+    assert reader.get("expired") is None
+
+
+def test_disk_cache_size_eviction(tmp_path):
+    cache = DiskCache(tmp_path / "cache.sqlite3", max_bytes=25)
+    cache.set("a", "x" * 10, ttl=60)
+    cache.set("b", "y" * 10, ttl=60)
+    cache.set("c", "z" * 10, ttl=60)
+
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+    assert cache.get("c") is not None
+
+
+def test_disk_cache_from_env(tmp_path, monkeypatch):
+    monkeypatch.delenv("ODMCP_CACHE_DIR", raising=False)
+    assert DiskCache.from_env("test") is None
+
+    monkeypatch.setenv("ODMCP_CACHE_DIR", str(tmp_path))
+    assert DiskCache.from_env("test").path == tmp_path / "test.sqlite3"
+
+
+@pytest.mark.anyio
+async def test_get_or_fetch_from_disk(tmp_path):
+    DiskCache(tmp_path / "cache.sqlite3").set("key", {"value": "disk"}, ttl=60)
+    cache = TTLCache(disk=DiskCache(tmp_path / "cache.sqlite3"))
+
+    async def fetch():
+        raise AssertionError("should be served from disk")
+
+    assert await cache.get_or_fetch("key", fetch) == {"value": "disk"}
+    assert cache.get("key") == {"value": "disk"}
+
+
+@pytest.mark.anyio
+async def test_single_flight_coalesces_concurrent_calls():
+    flights = SingleFlight()
+    calls = []
+    results = []
+
+    async def fetch():
+        calls.append(1)
+        await anyio.sleep(0.01)
+        return "value"
+
+    async def call():
+        results.append(await flights.do("key", fetch))
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(5):
+            tg.start_soon(call)
+
+    assert len(calls) == 1
+    assert results == ["value"] * 5
+    assert len(flights) == 0
+
+
+@pytest.mark.anyio
+async def test_single_flight_shares_errors():
+    flights = SingleFlight()
+    errors = []
+
+    async def fetch():
+        await anyio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    async def call():
+        try:
+            await flights.do("key", fetch)
+        except ValueError as e:
+            errors.append(e)
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(3):
+            tg.start_soon(call)
+
+    assert len(errors) == 3
+    assert len(flights) == 0
+
+
+@pytest.mark.anyio
+async def test_get_or_fetch_coalesces_misses():
+    cache = TTLCache()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await anyio.sleep(0.01)
+        return {"value": 1}
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(5):
+            tg.start_soon(cache.get_or_fetch, "key", fetch)
+
+    assert len(calls) == 1
@@ -1,9 +1,10 @@
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 
 import pytest
 from click.testing import CliRunner
 
 from odmcp.cli import cli
+from odmcp.registry import ProviderInfo
 
 
 @pytest.fixture
@@ -11,9 +12,20 @@ def runner():
     return CliRunner()
 
 
-def test_run_valid_provider(runner):
-    # TODO: Implement this test
-    pass
+@pytest.mark.parametrize("transport", ["stdio", "sse"])
+def test_run_valid_provider(runner, transport):
+    with patch("odmcp.utils.serve_providers", new=AsyncMock()) as serve_providers:
+        result = runner.invoke(
+            cli,
+            ["run", "ch_sbb", "--transport", transport, "--session-concurrency", "2"],
+        )
+
+        assert result.exit_code == 0
+        (modules,), kwargs = serve_providers.await_args
+        assert [module.__name__ for module in modules] == ["odmcp.providers.ch_sbb"]
+        assert kwargs["transport"] == transport
+        assert kwargs["session_concurrency"] == 2
+        assert kwargs["prefix_tools"] is False
 
 
 def test_run_invalid_provider(runner):
@@ -22,6 +34,12 @@ def test_run_invalid_provider(runner):
     assert "Provider 'nonexistent_provider' not found." in result.output
 
 
+def test_serve_invalid_provider(runner):
+    result = runner.invoke(cli, ["serve", "--providers", "ch_sbb,nonexistent_provider"])
+    assert result.exit_code == 1
+    assert "Provider 'nonexistent_provider' not found." in result.output
+
+
 def test_list_providers(runner):
     mock_modules = ["provider1", "provider2"]
     with patch("pkgutil.iter_modules") as mock_iter_modules:
@@ -46,14 +64,15 @@ def test_list_no_providers(runner):
 
 
 def test_info_valid_provider(runner):
-    mock_module = type(
-        "Module",
-        (),
-        {"__doc__": "Test provider description", "SUPPORTED_TYPES": ["type1", "type2"]},
+    provider_info = ProviderInfo(
+        name="test_provider",
+        module="odmcp.providers.test_provider",
+        description="Test provider description",
+        supported_types=["type1", "type2"],
     )
 
-    with patch("importlib.import_module") as mock_import:
-        mock_import.return_value = mock_module
+    with patch("odmcp.cli.get_provider_info") as mock_get_provider_info:
+        mock_get_provider_info.return_value = provider_info
 
         result = runner.invoke(cli, ["info", "test_provider"])
 
@@ -63,6 +82,15 @@ def test_info_valid_provider(runner):
         assert "Supported types: type1, type2" in result.output
 
 
+def test_info_does_not_import_provider(runner):
+    with patch("importlib.import_module") as mock_import:
+        result = runner.invoke(cli, ["info", "ch_sbb"])
+
+        assert result.exit_code == 0
+        assert "Swiss Federal Railways" in result.output
+        mock_import.assert_not_called()
+
+
 def test_info_invalid_provider(runner):
     result = runner.invoke(cli, ["info", "nonexistent_provider"])
     assert result.exit_code == 1
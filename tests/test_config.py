@@ -0,0 +1,33 @@
+from typing import ClassVar
+
+from odmcp.config import EnvConfig
+
+
+class ExampleConfig(EnvConfig):
+    env_prefix: ClassVar[str] = "ODMCP_EXAMPLE_"
+
+    size: int = 1
+    rate: float | None = 2.0
+    codes: frozenset[int] = frozenset()
+    name: str = "x"
+
+
+def test_from_env_coerces_fields(monkeypatch):
+    monkeypatch.setenv("ODMCP_EXAMPLE_SIZE", "5")
+    monkeypatch.setenv("ODMCP_EXAMPLE_RATE", "none")
+    monkeypatch.setenv("ODMCP_EXAMPLE_CODES", "429, 503,")
+    monkeypatch.setenv("ODMCP_EXAMPLE_NAME", "None")
+
+    config = ExampleConfig.from_env()
+
+    assert config.size == 5
+    assert config.rate is None
+    assert config.codes == {429, 503}
+    assert config.name == "None"  # only optional fields read 'none' as None
+
+
+def test_from_env_overrides(monkeypatch):
+    monkeypatch.setenv("ODMCP_EXAMPLE_SIZE", "5")
+
+    assert ExampleConfig.from_env(size=3).size == 3
+    assert ExampleConfig.from_env().rate == 2.0
@@ -0,0 +1,63 @@
+import json
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from odmcp.formatting import format_response, select_fields
+
+
+class Item(BaseModel):
+    name: Optional[str] = None
+    speed: Optional[int] = None
+    point: Optional[dict] = None
+
+
+class Response(BaseModel):
+    total_count: int
+    results: List[Item]
+
+
+RESPONSE = Response(
+    total_count=2,
+    results=[
+        Item(name="Re 460", speed=200, point={"lon": 7.4, "lat": 46.9}),
+        Item(name="Zürich", speed=None),
+    ],
+)
+
+
+def test_select_fields():
+    assert select_fields("title, description") == ["title", "description"]
+    assert select_fields("count(*) as n") is None
+    assert select_fields(None) is None
+
+
+def test_format_json_is_compact():
+    text = format_response(RESPONSE)
+
+    assert " " not in text.replace("Re 460", "")
+    assert "Zürich" in text
+    assert json.loads(text)["results"][1] == {"name": "Zürich"}
+
+
+def test_format_json_projects_fields():
+    text = format_response(RESPONSE, fields=["speed"])
+
+    assert json.loads(text)["results"] == [{"speed": 200}, {}]
+
+
+def test_format_csv():
+    text = format_response(RESPONSE, "csv")
+
+    assert text.splitlines() == [
+        "# total_count: 2",
+        "name,speed,point",
+        'Re 460,200,"{""lon"":7.4,""lat"":46.9}"',
+        "Zürich,,",
+    ]
+
+
+def test_format_tsv():
+    text = format_response(RESPONSE, "tsv", fields=["name", "speed"])
+
+    assert text.splitlines()[1:] == ["name\tspeed", "Re 460\t200", "Zürich\t"]
@@ -0,0 +1,73 @@
+from odmcp.geo import (
+    SpatialIndex,
+    decode_polyline,
+    encode_polyline,
+    quantize,
+    simplify_line,
+)
+
+
+def test_simplify_line_drops_collinear_points():
+    line = [[0.0, 0.0], [1.0, 0.00001], [2.0, 0.0], [3.0, 1.0]]
+
+    assert simplify_line(line, 0.001) == [[0.0, 0.0], [2.0, 0.0], [3.0, 1.0]]
+    assert simplify_line(line, 0) == line
+
+
+def test_simplify_line_keeps_end_points():
+    line = [[0.0, 0.0], [0.5, 0.0], [1.0, 0.0]]
+
+    assert simplify_line(line, 10) == [[0.0, 0.0], [1.0, 0.0]]
+
+
+def test_quantize():
+    line = [[8.5401921, 47.3781771], [8.5401924, 47.3781769], [7.4391, 46.9490]]
+
+    assert quantize(line, 5) == [[8.54019, 47.37818], [7.4391, 46.949]]
+
+
+def test_encode_polyline():
+    # reference example of the encoded polyline algorithm, as [lon, lat] pairs
+    line = [[-120.2, 38.5], [-120.95, 40.7], [-126.453, 43.252]]
+
+    assert encode_polyline(line) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+    assert decode_polyline("_p~iF~ps|U_ulLnnqC_mqNvxq`@") == line
+
+
+def test_spatial_index_nearest():
+    index = SpatialIndex(cell_size_km=5, ref_lat=47)
+    index.insert("zurich-bern", [[8.540192, 47.378177], [7.439122, 46.949083]])
+    index.insert("basel-luzern", [[7.589576, 47.547184], [8.310485, 47.050168]])
+    index.insert("geneva", [[6.142, 46.210]])
+
+    nearest = index.nearest(7.44, 46.95, k=2)
+
+    assert [key for _, key in nearest] == ["zurich-bern", "basel-luzern"]
+    assert nearest[0][0] < 1
+    assert index.nearest(6.15, 46.21, k=3, max_distance_km=5) == [
+        (index.distance_km("geneva", 6.15, 46.21), "geneva")
+    ]
+
+
+def test_spatial_index_within_bbox():
+    index = SpatialIndex(cell_size_km=5, ref_lat=47)
+    index.insert("zurich-bern", [[8.540192, 47.378177], [7.439122, 46.949083]])
+    index.insert("basel-luzern", [[7.589576, 47.547184], [8.310485, 47.050168]])
+    index.insert("geneva", [[6.142, 46.210]])
+
+    # the box around Olten is crossed by both lines without containing a vertex
+    assert index.within_bbox(7.8, 47.1, 8.0, 47.4) == ["zurich-bern", "basel-luzern"]
+    assert index.within_bbox(6.0, 46.0, 6.5, 46.5) == ["geneva"]
+    assert index.within_bbox(10.0, 46.0, 10.5, 46.5) == []
+
+
+def test_spatial_index_nearest_far_outside_data():
+    index = SpatialIndex(cell_size_km=1, ref_lat=47)
+    index.insert("zurich-bern", [[8.540192, 47.378177], [7.439122, 46.949083]])
+    index.insert("geneva", [[6.142, 46.210]])
+
+    # New York, thousands of rings away from the data
+    nearest = index.nearest(-74.0, 40.7, k=2)
+
+    assert [key for _, key in nearest] == ["geneva", "zurich-bern"]
+    assert index.nearest(-74.0, 40.7, max_distance_km=100) == []
@@ -0,0 +1,44 @@
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from odmcp.http import HTTPClientConfig, _CLIENTS, fetch_json, http_client
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def test_config_from_env(monkeypatch):
+    monkeypatch.setenv("ODMCP_HTTP_MAX_CONNECTIONS", "42")
+    monkeypatch.setenv("ODMCP_HTTP_HTTP2", "true")
+
+    config = HTTPClientConfig.from_env(keepalive_expiry=5)
+
+    assert config.max_connections == 42
+    assert config.http2 is True
+    assert config.keepalive_expiry == 5
+
+
+@pytest.mark.anyio
+async def test_http_client_registers_pool():
+    async with http_client("test-provider") as client:
+        assert _CLIENTS["test-provider"] is client
+        assert not client.is_closed
+
+    assert "test-provider" not in _CLIENTS
+    assert client.is_closed
+
+
+@pytest.mark.anyio
+async def test_fetch_json_uses_pooled_client():
+    async with http_client("test-provider") as client:
+        response = Mock(json=Mock(return_value={"ok": True}))
+        mock_get = AsyncMock(return_value=response)
+        with patch.object(client, "get", new=mock_get):
+            data = await fetch_json("https://example.com", provider="test-provider")
+
+        mock_get.assert_awaited_once_with("https://example.com", params=None)
+        assert data == {"ok": True}
+        response.raise_for_status.assert_called_once()
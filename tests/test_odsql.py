@@ -0,0 +1,103 @@
+import pytest
+
+from odmcp.odsql import UnsupportedQuery, compile_query
+
+RECORDS = [
+    {"typ": "Re 460", "vmax": 230, "seats": None, "active": True},
+    {"typ": "Re 460", "vmax": 200, "seats": 10, "active": False},
+    {"typ": "IC 2000", "vmax": 200, "seats": 120, "active": True},
+    {"typ": "RABe 511", "vmax": 160, "seats": 200, "active": True},
+]
+
+
+def run(limit=10, offset=0, **clauses):
+    return compile_query(**clauses).run(RECORDS, limit=limit, offset=offset)
+
+
+@pytest.mark.parametrize(
+    "where,expected",
+    [
+        ('typ = "Re 460"', [230, 200]),
+        ("vmax >= 200 AND NOT typ = 'IC 2000'", [230, 200]),
+        ("(vmax < 200 OR seats > 100) and active = true", [200, 160]),
+        ("seats IS NULL", [230]),
+        ('seats is not null and `typ` != "x"', [200, 200, 160]),
+        ("vmax > -1.5e2", [230, 200, 200, 160]),
+        ("typ > 5", []),  # text compared with a number never matches
+    ],
+)
+def test_where(where, expected):
+    assert [r["vmax"] for r in run(where=where)["results"]] == expected
+
+
+def test_order_limit_offset_and_select():
+    response = run(
+        select="typ, vmax as speed",
+        order_by="vmax DESC, typ",
+        limit=2,
+        offset=1,
+    )
+
+    assert response["total_count"] == 4
+    assert response["results"] == [
+        {"typ": "IC 2000", "speed": 200},
+        {"typ": "Re 460", "speed": 200},
+    ]
+
+
+def test_order_by_select_alias():
+    results = run(select="typ, seats as n", order_by="n DESC")["results"]
+    assert [r["n"] for r in results] == [200, 120, 10, None]
+
+
+def test_order_puts_missing_values_last():
+    results = run(order_by="seats DESC")["results"]
+    assert [r["seats"] for r in results] == [200, 120, 10, None]
+
+
+def test_group_by_with_aggregates():
+    response = run(
+        select="typ, count(*) as n, avg(vmax), max(seats)",
+        group_by="typ",
+        order_by="n DESC, typ",
+    )
+
+    assert response["total_count"] == 3
+    assert response["results"] == [
+        {"typ": "Re 460", "n": 2, "avg(vmax)": 215, "max(seats)": 10},
+        {"typ": "IC 2000", "n": 1, "avg(vmax)": 200, "max(seats)": 120},
+        {"typ": "RABe 511", "n": 1, "avg(vmax)": 160, "max(seats)": 200},
+    ]
+
+
+def test_aggregates_without_group_by():
+    assert run(select="count(*), sum(seats)", where="vmax > 1000")["results"] == [
+        {"count(*)": 0, "sum(seats)": None}
+    ]
+
+
+@pytest.mark.parametrize("select", ["avg(typ)", "sum(active)"])
+def test_aggregates_of_non_numbers(select):
+    with pytest.raises(UnsupportedQuery):
+        run(select=select)
+
+
+@pytest.mark.parametrize(
+    "clauses",
+    [
+        {"where": 'typ LIKE "*Re*"'},
+        {"where": '"search text"'},
+        {"where": "vmax > now()"},
+        {"where": "vmax + 1 > 2"},
+        {"select": "upper(typ)"},
+        {"select": "typ, count(*)"},
+        {"select": "vmax", "group_by": "typ"},
+        {"group_by": "year(built)"},
+        {"order_by": "random(1)"},
+        {"group_by": "typ", "order_by": "vmax DESC"},
+        {"select": "typ, count(*) as n", "group_by": "typ", "order_by": "seats"},
+    ],
+)
+def test_unsupported_queries(clauses):
+    with pytest.raises(UnsupportedQuery):
+        compile_query(**clauses)
@@ -0,0 +1,95 @@
+import anyio
+import httpx
+import pytest
+
+from odmcp.http import _CLIENTS, _LIMITERS, fetch_json, set_limiter
+from odmcp.ratelimit import RateLimitConfig, TokenBucket, UpstreamLimiter
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def test_config_from_env(monkeypatch):
+    monkeypatch.setenv("ODMCP_UPSTREAM_REQUESTS_PER_SECOND", "2.5")
+    monkeypatch.setenv("ODMCP_UPSTREAM_MAX_IN_FLIGHT", "none")
+
+    config = RateLimitConfig.from_env(burst=3)
+
+    assert config.requests_per_second == 2.5
+    assert config.max_in_flight is None
+    assert config.burst == 3
+
+
+@pytest.mark.anyio
+async def test_token_bucket_waits_once_empty():
+    bucket = TokenBucket(rate=50, burst=2)
+
+    start = anyio.current_time()
+    for _ in range(4):
+        await bucket.acquire()
+
+    # the burst passes at once, the two next requests wait 1/50 s each
+    assert anyio.current_time() - start >= 0.035
+
+
+@pytest.mark.anyio
+async def test_limiter_caps_requests_in_flight():
+    limiter = UpstreamLimiter(
+        RateLimitConfig(requests_per_second=None, max_in_flight=2)
+    )
+    in_flight = peak = 0
+
+    async def request():
+        nonlocal in_flight, peak
+        async with limiter.acquire():
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await anyio.sleep(0.01)
+            in_flight -= 1
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(6):
+            tg.start_soon(request)
+
+    stats = limiter.stats()
+    assert peak == 2
+    assert stats["requests"] == 6
+    assert stats["waiting"] == 0
+    assert stats["in_flight"] == 0
+    assert stats["max_wait"] > 0
+
+
+@pytest.mark.anyio
+async def test_limiter_cancelled_while_queued():
+    limiter = UpstreamLimiter(
+        RateLimitConfig(requests_per_second=None, max_in_flight=1)
+    )
+
+    async with limiter.acquire():
+        with anyio.move_on_after(0.01):
+            async with limiter.acquire():
+                pass
+        assert limiter.stats()["waiting"] == 0
+
+    assert limiter.stats()["requests"] == 1
+
+
+@pytest.mark.anyio
+async def test_fetch_json_uses_endpoint_limiters(monkeypatch):
+    client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, json={}))
+    )
+    provider_limiter = UpstreamLimiter()
+    export_limiter = UpstreamLimiter()
+    monkeypatch.setitem(_CLIENTS, "test-provider", client)
+    monkeypatch.setitem(_LIMITERS, "test-provider", {})
+    set_limiter("test-provider", provider_limiter)
+    set_limiter("test-provider", export_limiter, endpoint="https://x/exports")
+
+    await fetch_json("https://x/records", provider="test-provider")
+    await fetch_json("https://x/exports/jsonl", provider="test-provider")
+
+    assert provider_limiter.stats()["requests"] == 2
+    assert export_limiter.stats()["requests"] == 1
@@ -0,0 +1,63 @@
+import sys
+from importlib.metadata import EntryPoint
+from unittest.mock import patch
+
+from odmcp.registry import (
+    ENTRY_POINT_GROUP,
+    get_provider_info,
+    list_providers,
+    provider_module,
+)
+
+
+def test_list_providers():
+    assert "ch_sbb" in list_providers()
+    assert "__template__" not in list_providers()
+
+
+def test_get_provider_info_reads_source_statically(monkeypatch):
+    monkeypatch.delitem(sys.modules, "odmcp.providers.ch_sbb", raising=False)
+
+    info = get_provider_info("ch_sbb")
+
+    assert info.module == "odmcp.providers.ch_sbb"
+    assert info.description.startswith("Swiss Federal Railways (SBB) Data API Client")
+    assert "odmcp.providers.ch_sbb" not in sys.modules
+
+
+def test_get_provider_info_from_entry_point(tmp_path, monkeypatch):
+    (tmp_path / "external_provider.py").write_text(
+        '"""External provider."""\nSUPPORTED_TYPES = ["tools", "resources"]\n'
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    with patch(
+        "odmcp.registry._entry_point_providers",
+        return_value={"external": "external_provider"},
+    ):
+        assert "external" in list_providers()
+        info = get_provider_info("external")
+
+    assert info.description == "External provider."
+    assert info.supported_types == ["tools", "resources"]
+    assert "external_provider" not in sys.modules
+
+
+def test_entry_point_with_attribute(tmp_path, monkeypatch):
+    (tmp_path / "external_provider.py").write_text('"""External provider."""\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    entry_point = EntryPoint(
+        name="external", value="external_provider:main", group=ENTRY_POINT_GROUP
+    )
+
+    with patch("odmcp.registry.entry_points", return_value=[entry_point]):
+        assert "external" in list_providers()
+        assert provider_module("external") == "external_provider"
+        info = get_provider_info("external")
+
+    assert info.module == "external_provider"
+    assert info.description == "External provider."
+
+
+def test_get_provider_info_missing():
+    assert get_provider_info("nonexistent_provider") is None
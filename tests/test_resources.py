@@ -0,0 +1,82 @@
+import pytest
+from pydantic import AnyUrl
+
+from odmcp.resources import ResourceRouter
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def line(linie):
+    return f"line {linie}"
+
+
+async def latest():
+    return "latest line"
+
+
+async def sections(linie, section):
+    for chunk in (f"line {linie}", f" section {section}"):
+        yield chunk
+
+
+@pytest.fixture
+def router():
+    return ResourceRouter(
+        {
+            "sbb://linie/{linie}": line,
+            "sbb://linie/latest": latest,
+            "sbb://linie/{linie}/{section}": sections,
+            AnyUrl("sbb://disruptions/active"): lambda: b"active",
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "uri,expected",
+    [
+        ("sbb://linie/100", "line 100"),
+        ("sbb://linie/latest", "latest line"),
+        ("sbb://linie/a%20b", "line a b"),
+        ("sbb://linie/100/3", "line 100 section 3"),
+        (AnyUrl("sbb://disruptions/active"), b"active"),
+    ],
+)
+@pytest.mark.anyio
+async def test_read(router, uri, expected):
+    assert await router.read(uri) == expected
+
+
+@pytest.mark.parametrize(
+    "uri", ["sbb://linie/", "sbb://linie", "sbb://linie/100/3/x", "other://linie/100"]
+)
+def test_unmatched_uris(router, uri):
+    assert router.match(uri) is None
+
+
+def test_literal_segments_take_precedence(router):
+    assert router.match("sbb://linie/latest") == (latest, {})
+    assert router.match("sbb://linie/100") == (line, {"linie": "100"})
+    assert len(router) == 4
+
+
+@pytest.mark.parametrize(
+    "template",
+    [
+        "sbb://linie/{linie}",  # already registered
+        "sbb://linie/{id}/x",  # placeholder named differently
+        "sbb://x/{a}/{a}",
+        "sbb://x/line-{a}",
+    ],
+)
+def test_invalid_templates(router, template):
+    with pytest.raises(ValueError):
+        router.add(template, line)
+
+
+@pytest.mark.anyio
+async def test_read_unknown_resource(router):
+    with pytest.raises(LookupError):
+        await router.read("sbb://unknown")
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+from odmcp.http import _CLIENTS, fetch_json
+from odmcp.retry import RetryPolicy, parse_retry_after
+
+FAST = RetryPolicy(backoff_base=0.001, backoff_max=0.01)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def responses(monkeypatch):
+    """Serve the queued responses in order from a mocked provider client."""
+    queue: list[httpx.Response | Exception] = []
+    requests: list[httpx.Request] = []
+
+    def handler(request):
+        requests.append(request)
+        response = queue.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setitem(_CLIENTS, "test-provider", client)
+    return queue, requests
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("2") == 2
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+    date = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), True)
+    assert 25 < parse_retry_after(date) <= 30
+
+
+def test_policy_from_env(monkeypatch):
+    monkeypatch.setenv("ODMCP_RETRY_MAX_ATTEMPTS", "5")
+    monkeypatch.setenv("ODMCP_RETRY_RETRY_STATUSES", "429,503")
+
+    policy = RetryPolicy.from_env(deadline=5)
+
+    assert policy.max_attempts == 5
+    assert policy.retry_statuses == {429, 503}
+    assert policy.deadline == 5
+
+
+@pytest.mark.anyio
+async def test_retries_transient_errors(responses):
+    queue, requests = responses
+    queue.extend(
+        [
+            httpx.Response(503),
+            httpx.ConnectError("refused"),
+            httpx.Response(200, json={"ok": True}),
+        ]
+    )
+
+    result = await fetch_json("https://x", provider="test-provider", retry=FAST)
+
+    assert result == {"ok": True}
+    assert len(requests) == 3
+
+
+@pytest.mark.anyio
+async def test_does_not_retry_client_errors(responses):
+    queue, requests = responses
+    queue.append(httpx.Response(404))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await fetch_json("https://x", provider="test-provider", retry=FAST)
+    assert len(requests) == 1
+
+
+@pytest.mark.anyio
+async def test_gives_up_after_max_attempts(responses):
+    queue, requests = responses
+    queue.extend([httpx.Response(502)] * 3)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await fetch_json("https://x", provider="test-provider", retry=FAST)
+    assert len(requests) == 3
+
+
+@pytest.mark.anyio
+async def test_retry_after_beyond_deadline_is_not_awaited(responses):
+    queue, requests = responses
+    queue.append(httpx.Response(429, headers={"Retry-After": "120"}))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await fetch_json(
+            "https://x",
+            provider="test-provider",
+            retry=FAST.model_copy(update={"deadline": 5}),
+        )
+    assert len(requests) == 1
@@ -0,0 +1,68 @@
+from typing import List, Literal, Optional
+from unittest.mock import patch
+
+import pytest
+from pydantic import BaseModel, Field
+
+from odmcp import schemas
+from odmcp.schemas import model_digest, model_json_schema, save_schema_cache
+
+
+class CachedParams(BaseModel):
+    name: str = Field(description="A name")
+
+
+class Item(BaseModel):
+    format: Literal["json", "csv"] = "json"
+
+
+class NestedParams(BaseModel):
+    items: Optional[List[Item]] = None
+
+
+@pytest.fixture(autouse=True)
+def schema_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("ODMCP_SCHEMA_CACHE", "1")
+    monkeypatch.setenv("ODMCP_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(schemas, "_MODULES", {})
+    return tmp_path / "schemas"
+
+
+def test_schema_is_cached_on_disk(schema_cache):
+    schema = model_json_schema(CachedParams)
+    model_json_schema(NestedParams)
+    assert not schema_cache.exists()  # written once per module
+
+    save_schema_cache()
+
+    assert schema == CachedParams.model_json_schema()
+    assert [path.name for path in schema_cache.iterdir()] == [f"{__name__}.json"]
+
+
+def test_schema_is_loaded_from_disk(monkeypatch):
+    model_json_schema(CachedParams)
+    save_schema_cache()
+    monkeypatch.setattr(schemas, "_MODULES", {})  # as in a new process
+
+    with patch.object(CachedParams, "model_json_schema") as generate:
+        schema = model_json_schema(CachedParams)
+
+    generate.assert_not_called()
+    assert schema["properties"]["name"]["description"] == "A name"
+
+
+def test_digest_follows_nested_models(monkeypatch):
+    digest = model_digest(NestedParams)
+    assert model_digest(NestedParams) == digest
+
+    monkeypatch.setattr(Item.model_fields["format"], "default", "csv")
+
+    assert model_digest(NestedParams) != digest
+
+
+def test_schema_cache_disabled(schema_cache, monkeypatch):
+    monkeypatch.setenv("ODMCP_SCHEMA_CACHE", "0")
+
+    assert model_json_schema(CachedParams) == CachedParams.model_json_schema()
+    save_schema_cache()
+    assert not schema_cache.exists()
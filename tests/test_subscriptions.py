@@ -0,0 +1,50 @@
+import anyio
+import mcp.types as types
+import pytest
+from mcp.server import NotificationOptions
+from mcp.shared.memory import create_connected_server_and_client_session
+from pydantic import AnyUrl
+
+from odmcp.subscriptions import SUBSCRIPTIONS
+from odmcp.utils import create_mcp_server
+
+URI = "test://resource/updated"
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def server():
+    async def read_resource() -> str:
+        return "content"
+
+    resource = types.Resource(uri=AnyUrl(URI), name="Test resource")
+    return create_mcp_server("test", [resource], {AnyUrl(URI): read_resource})
+
+
+def test_capabilities_advertise_subscriptions(server):
+    capabilities = server.get_capabilities(NotificationOptions(), {})
+    assert capabilities.resources.subscribe is True
+
+
+@pytest.mark.anyio
+async def test_subscribers_are_notified(server):
+    async with create_connected_server_and_client_session(server) as session:
+        result = await session.read_resource(AnyUrl(URI))
+        assert result.contents[0].text == "content"
+
+        await session.subscribe_resource(AnyUrl(URI))
+        assert SUBSCRIPTIONS.subscribers(URI) == 1
+
+        assert await SUBSCRIPTIONS.notify(URI) == 1
+        with anyio.fail_after(1):
+            message = await session.incoming_messages.receive()
+        assert isinstance(message.root, types.ResourceUpdatedNotification)
+        assert str(message.root.params.uri) == URI
+
+        await session.unsubscribe_resource(AnyUrl(URI))
+        assert SUBSCRIPTIONS.subscribers(URI) == 0
+        assert await SUBSCRIPTIONS.notify(URI) == 0